@@ -6,7 +6,8 @@ import sqlite3
 import asyncio
 import re
 from fastapi import APIRouter, HTTPException, Path, Response, Depends, Query
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional
 from io import BytesIO
 
 # ReportLab imports for PDF generation
@@ -379,6 +380,31 @@ async def get_full_case_document(
         logger.error(f"Error retrieving case: {str(e)}")
         raise HTTPException(status_code=404, detail=f"Error retrieving case: {str(e)}")
 
+class BatchCaseRequest(BaseModel):
+    case_ids: List[str] = Field(..., description="Case IDs to retrieve in one round-trip")
+
+@router.post("/batch/full", response_model=Dict[str, Any])
+async def get_full_case_documents_batch(request: BatchCaseRequest):
+    """Get full document content for several cases in a single request.
+
+    Prefetch clients would otherwise issue one HTTP round-trip per case;
+    this endpoint resolves all of them concurrently server-side and
+    returns the same per-case shape as /case/{point_id}/full.
+    """
+    async def fetch_one(case_id: str) -> Dict[str, Any]:
+        try:
+            # Called outside FastAPI DI, so the Query default would be
+            # bound as a truthy FieldInfo — pass title explicitly
+            return await get_full_case_document(case_id, title=None)
+        except HTTPException as e:
+            return {"case_id": case_id, "error": e.detail}
+        except Exception as e:
+            logger.error(f"Error retrieving case {case_id} in batch: {str(e)}")
+            return {"case_id": case_id, "error": str(e)}
+
+    results = await asyncio.gather(*(fetch_one(cid) for cid in request.case_ids))
+    return {"results": results}
+
 @router.get("/{point_id}/pdf", response_class=Response)
 async def get_case_pdf(
     point_id: str = Path(..., description="The ID of the case"),
@@ -212,6 +212,28 @@ class CaseDocumentService:
             logger.error(f"Error retrieving case by CID {cid}: {e}")
             return None
 
+    def get_case_preview(self, case_id: str, max_chars: int = 512) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a case with only a bounded text preview.
+
+        Callers that just display the first few hundred characters should
+        use this instead of full_text=True so multi-megabyte opinions are
+        never materialized into the result.
+
+        Args:
+            case_id: The ID of the case to retrieve
+            max_chars: Maximum number of text characters to include (default: 512)
+
+        Returns:
+            A dictionary containing the case metadata and text preview, or None
+        """
+        case_data = self.get_case_by_id(case_id, full_text=False)
+
+        if case_data and case_data.get("text"):
+            case_data["text"] = case_data["text"][:max_chars]
+
+        return case_data
+
     def generate_pdf(self, case_id: str) -> Optional[bytes]:
         """
         Generate a PDF for a case.
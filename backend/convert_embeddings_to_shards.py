@@ -0,0 +1,94 @@
+# convert_embeddings_to_shards.py
+
+"""
+One-off converter that re-emits each worker's batch pickles as a single
+contiguous shard: a raw [N, 768] float32 matrix (shard.f32) plus a JSONL
+sidecar with one {"id", "payload"} line per row.
+
+The uploader memory-maps the matrix and slices rows straight into upsert
+batches, so a full worker directory costs two file opens instead of one
+open/stat/close round per batch file, hundreds of small-file syscalls
+collapse into two sequential reads, and no per-vector Python lists are
+rebuilt.
+
+Usage:
+  python convert_embeddings_to_shards.py
+"""
+
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from upload_vectors import (
+    EMBEDDINGS_DIR,
+    SHARD_PAYLOADS_FILE,
+    SHARD_VECTORS_FILE,
+    VECTOR_SIZE,
+    get_pickle_files,
+    get_worker_dirs,
+    process_pickle_file,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def convert_worker_directory(worker_dir):
+    """Convert one worker directory's pickles into a shard pair.
+
+    Vectors are appended to the .f32 file as they are loaded, so peak
+    memory stays at one batch file regardless of shard size.
+    """
+    worker_path = Path(worker_dir)
+    worker_name = worker_path.name
+
+    vectors_path = worker_path / SHARD_VECTORS_FILE
+    payloads_path = worker_path / SHARD_PAYLOADS_FILE
+    if vectors_path.exists() and payloads_path.exists():
+        logger.info(f"{worker_name}: shard already exists, skipping")
+        return 0
+
+    pickle_files = get_pickle_files(worker_dir)
+    if not pickle_files:
+        logger.warning(f"{worker_name}: no pickle files found")
+        return 0
+
+    total_rows = 0
+    with open(vectors_path, "wb") as vec_f, open(payloads_path, "w") as pay_f:
+        for file_path in pickle_files:
+            columns = process_pickle_file(file_path)
+            if not columns["ids"]:
+                continue
+
+            matrix = np.asarray(columns["vectors"], dtype=np.float32)
+            if matrix.ndim != 2 or matrix.shape[1] != VECTOR_SIZE:
+                logger.error(f"{worker_name}: bad vector shape {matrix.shape} in {file_path}, skipping file")
+                continue
+
+            matrix.tofile(vec_f)
+            for point_id, payload in zip(columns["ids"], columns["payloads"]):
+                pay_f.write(json.dumps({"id": point_id, "payload": payload}) + "\n")
+            total_rows += len(columns["ids"])
+
+    logger.info(f"{worker_name}: wrote {total_rows} rows to {vectors_path.name}")
+    return total_rows
+
+def main():
+    """Convert every worker directory under the embeddings root."""
+    worker_dirs = get_worker_dirs()
+    if not worker_dirs:
+        logger.error(f"No worker directories found in {EMBEDDINGS_DIR}")
+        return
+
+    total = 0
+    for worker_dir in worker_dirs:
+        total += convert_worker_directory(worker_dir)
+
+    logger.info(f"Conversion complete: {total} rows across {len(worker_dirs)} worker directories")
+
+if __name__ == "__main__":
+    main()
@@ -4,24 +4,41 @@
 import os
 import time
 import uuid
+import asyncio
+import hashlib
 import json
 import pickle
 import logging
 import threading
 import multiprocessing
+import queue
 import random
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime, timedelta
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 from dotenv import load_dotenv
 from huggingface_hub import list_repo_files, hf_hub_download
 import tiktoken
 import tqdm
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Batch,
+    CollectionStatus,
+    Distance,
+    OptimizersConfigDiff,
+    PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
 from sentence_transformers import SentenceTransformer
 
 # --- Configuration ---
@@ -38,33 +55,49 @@ MODEL_DIR = BASE_DIR / "models"  # Directory to store downloaded models
 # --- Dataset Information ---
 REPO_ID = "laion/Caselaw_Access_Project_embeddings"
 CLUSTER_PREFIX = "TeraflopAI___Caselaw_Access_Project_clusters/"
+# Stream record batches straight from the Hub with HTTP range reads and
+# column projection instead of downloading whole files first. Set to
+# False to fall back to hf_hub_download + local reads.
+STREAM_FROM_HUB = os.getenv("STREAM_FROM_HUB", "True").lower() in ("true", "1", "t")
+SCAN_BATCH_SIZE = 8192  # Rows per streamed record batch
+# Decode columns of a row group in parallel only when it is worth the
+# fan-out: enough projected columns and a big enough uncompressed group.
+COLUMN_PARALLEL_MIN_COLS = 3
+COLUMN_PARALLEL_MIN_RG_BYTES = 16 * 1024 * 1024
 
 # --- Embedding Model Configuration ---
 EMBEDDING_MODEL = "BAAI/bge-base-en-v1.5"  # We'll use this same model locally
 VECTOR_DIM = 768
 USE_GPU = True  # Set to True to use GPU acceleration if available
-BATCH_SIZE_EMBEDDING = 8  # Batching for the embedding model
+GPU_BATCH_SIZE = 256  # Large batches keep the single shared GPU saturated
 
 # --- Token Limit Configuration ---
 MAX_SAFE_TOKENS = 512  # SentenceTransformers typically handles ~512 tokens
-MAX_TOKEN_ATTEMPTS = 3  # Number of times to try reducing tokens before giving up
-TOKEN_REDUCTION_FACTOR = 0.8  # How much to reduce by on each attempt
+# Texts at or below this many characters go straight to the model, whose
+# own tokenizer truncates to MAX_SAFE_TOKENS; only the long tail pays for
+# a tiktoken pre-truncation pass to keep huge strings out of the encoder.
+CHAR_TRUNCATION_THRESHOLD = MAX_SAFE_TOKENS * 6
 TOKENIZER = tiktoken.get_encoding("cl100k_base")
 
 # --- Parallelism Configuration ---
+# One process owns the GPU; downloads and Arrow decode run on threads so
+# I/O and CPU work overlap with encoding instead of competing for the device.
 CPU_COUNT = multiprocessing.cpu_count()
-NUM_WORKERS = max(1, min(CPU_COUNT - 2, 8))  # Save some cores for system, but max 8 workers
+NUM_DECODE_WORKERS = max(1, min(CPU_COUNT - 2, 8))  # Arrow decode / row preparation threads
 MAX_CONCURRENT_DOWNLOADS = 2  # Maximum concurrent downloads
+PREPARED_QUEUE_MAX = NUM_DECODE_WORKERS * 4  # Bound decode so it cannot outrun the GPU
+PREFETCH_FILE_LOOKAHEAD = MAX_CONCURRENT_DOWNLOADS * 2  # Files downloaded ahead of decode
 
 # --- Processing Parameters ---
 BATCH_SIZE = 1000  # Points per batch saved to disk (increased for local processing)
 MAX_RETRIES = 3  # Retries for embedding generation
+MIN_ENCODE_TEXTS = GPU_BATCH_SIZE * 4  # Coalesce texts across parquet batches before encoding
 
 # --- Payload Configuration ---
 PAYLOAD_FIELD_MAPPING = {
     "name_abbreviation": "title",
     "decision_date": "date",
-    "citations": "citations", 
+    "citations": "citations",
     "court": "court",
     "jurisdiction": "jurisdiction",
     "volume": "volume",
@@ -75,12 +108,45 @@ PAYLOAD_FIELD_MAPPING = {
 }
 TEXT_FIELD = "text"
 SNIPPET_LENGTH = 300
+# Vectorized row preparation via pyarrow.compute kernels; set to False to
+# fall back to the per-row Python loop if a file has an unexpected schema.
+USE_VECTORIZED_ROWPREP = True
 
 # --- Qdrant Configuration ---
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "caselaw")
 USE_DIRECT_QDRANT = os.getenv("USE_DIRECT_QDRANT", "False").lower() in ("true", "1", "t")
+# Parsed once so every call site agrees on how the flag is interpreted
+QDRANT_LOAD_EMBEDDINGS_ENABLED = os.getenv("QDRANT_LOAD_EMBEDDINGS", "False").lower() in ("true", "1", "t")
+# With direct upserts enabled the batch pickles are a redundant second
+# copy of every vector; set PERSIST_BATCHES=False to skip the disk
+# round-trip and treat Qdrant as the sole sink.
+PERSIST_BATCHES = os.getenv("PERSIST_BATCHES", "True").lower() in ("true", "1", "t") or not USE_DIRECT_QDRANT
+QDRANT_UPLOAD_BATCH = 256  # Sub-batch size used by the client-side uploader
+# Points per upsert request during bulk load. 100 under-filled each
+# request (~300KB of 768-d float32); 256 keeps requests well under the
+# per-request sweet spot while cutting round-trips 2.5x. Capped so a
+# misconfigured value can't push a single request past ~16MB of vectors.
+MAX_UPSERT_BATCH = min(
+    int(os.getenv("MAX_UPSERT_BATCH", "256")),
+    (16 << 20) // (VECTOR_DIM * 4)
+)
+QDRANT_UPSERT_CONCURRENCY = 4  # Concurrent in-flight upserts during bulk load
+# Channel options shared by both Qdrant clients: keep-alives hold the
+# connection open across idle stretches (no TCP/TLS re-handshake on the
+# next burst) and the message caps let large upsert batches through
+# gRPC's 4MB default limit.
+QDRANT_GRPC_OPTIONS = {
+    "grpc.keepalive_time_ms": 30000,
+    "grpc.keepalive_timeout_ms": 10000,
+    "grpc.max_send_message_length": 64 << 20,
+    "grpc.max_receive_message_length": 64 << 20,
+}
+INDEXING_RESTORE_THRESHOLD = 20000  # indexing_threshold to restore after bulk load
+BATCH_READ_WORKERS = 4  # Threads deserializing batch files ahead of upload
+BATCH_READ_LOOKAHEAD = 8  # Batch files decoded ahead of the upload loop
 
 # --- Create directory structure ---
 for directory in [DOWNLOAD_DIR, OUTPUT_DIR, LOGS_DIR, TEMP_DIR, MODEL_DIR]:
@@ -97,12 +163,11 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger("parallel_processor")
-logger.info(f"Local embedding parallel processing started with {NUM_WORKERS} workers")
+logger.info(f"Local embedding pipeline started with {NUM_DECODE_WORKERS} decode workers")
 logger.info(f"Logs will be saved to {log_file_path}")
 
 # --- Global tracking variables ---
 download_semaphore = threading.Semaphore(MAX_CONCURRENT_DOWNLOADS)
-embedding_model_lock = threading.Lock()  # Lock for accessing the embedding model
 global_stats = {
     "files_total": 0,
     "files_processed": 0,
@@ -111,16 +176,56 @@ global_stats = {
     "embedding_failures": 0,
     "batches_saved": 0,
     "start_time": time.time(),
-    "processing_times": [],  # List of (records, seconds) tuples
     "files_in_progress": set(),  # Set of files currently being processed
 }
-stats_lock = threading.Lock()
+# global_stats needs no lock: every multi-field update happens on the main
+# thread's encode loop, and the only cross-thread mutations are single
+# set.add/discard calls, which are atomic under the GIL. Since there are
+# no worker processes either, plain ints beat multiprocessing.Value
+# counters — no per-value lock, no shared-memory setup.
 
-# --- Embedding model cache (shared between processes) ---
-# Note: Each process will load its own model instance
-embedding_models = {}
+# Per-file timings are appended to a JSONL file as they happen instead of
+# accumulating in global_stats, so snapshots stay O(scalars) no matter how
+# long the run is.
+PROCESSING_TIMES_FILE = LOGS_DIR / "processing_times.jsonl"
+
+def append_processing_time(file_path: str, records: int, seconds: float):
+    """Append one per-file timing record to the processing-times log."""
+    try:
+        with open(PROCESSING_TIMES_FILE, 'a') as f:
+            f.write(json.dumps(
+                {"file": file_path, "records": records, "seconds": round(seconds, 3)},
+                separators=(',', ':')
+            ) + "\n")
+    except Exception as e:
+        logger.error(f"Error appending processing time: {e}")
+
+# --- Embedding model (single instance, owned by the main thread) ---
+embedding_model: Optional[SentenceTransformer] = None
+
+# --- Embedding cache ---
+# Caselaw batches repeat boilerplate (syllabi, reporter blurbs); identical
+# truncated texts map to identical vectors, so keep a bounded LRU of
+# recent embeddings that persists across coalesced batches and files.
+EMBED_CACHE_MAX_ENTRIES = 50_000
+_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
 
 # --- Helper Functions ---
+_NAMESPACE_URL_BYTES = uuid.NAMESPACE_URL.bytes
+
+def fast_uuid5(name: str) -> str:
+    """Produce the same string as str(uuid.uuid5(uuid.NAMESPACE_URL, name)).
+
+    Skips the uuid.UUID object construction on the hot path: one SHA-1
+    over the precomputed namespace prefix plus the name, version/variant
+    bits patched in place, then direct hex formatting.
+    """
+    digest = bytearray(hashlib.sha1(_NAMESPACE_URL_BYTES + name.encode("utf-8")).digest()[:16])
+    digest[6] = (digest[6] & 0x0F) | 0x50  # Version 5
+    digest[8] = (digest[8] & 0x3F) | 0x80  # RFC 4122 variant
+    hex_str = digest.hex()
+    return f"{hex_str[:8]}-{hex_str[8:12]}-{hex_str[12:16]}-{hex_str[16:20]}-{hex_str[20:]}"
+
 def count_tokens(text: str) -> int:
     """Count the number of tokens in text using the tokenizer."""
     if not text:
@@ -136,7 +241,7 @@ def truncate_to_token_limit(text: str, max_tokens: int = MAX_SAFE_TOKENS) -> str
     """Truncate text to stay within the token limit."""
     if not text:
         return ""
-    
+
     try:
         tokens = TOKENIZER.encode(text)
         if len(tokens) > max_tokens:
@@ -147,137 +252,126 @@ def truncate_to_token_limit(text: str, max_tokens: int = MAX_SAFE_TOKENS) -> str
         char_estimate = max_tokens * 4  # Rough estimate
         return text[:char_estimate]
 
-def adaptive_token_truncation(text: str, worker_id: int) -> Optional[str]:
-    """Adaptively truncate text to fit within token limits, with multiple attempts."""
-    if not text:
-        return None
-    
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    current_text = text
-    current_limit = MAX_SAFE_TOKENS
-    
-    for attempt in range(MAX_TOKEN_ATTEMPTS):
-        try:
-            # Truncate to current limit
-            truncated = truncate_to_token_limit(current_text, current_limit)
-            token_count = count_tokens(truncated)
-            
-            if token_count <= current_limit:
-                if attempt > 0:
-                    worker_logger.info(f"Successfully truncated text to {token_count} tokens after {attempt+1} attempts")
-                return truncated
-            
-            # If still too long, reduce limit further
-            current_limit = int(current_limit * TOKEN_REDUCTION_FACTOR)
-            worker_logger.warning(f"Text still too long ({token_count} tokens). Reducing to {current_limit} tokens.")
-        
-        except Exception as e:
-            worker_logger.error(f"Error during token truncation: {e}")
-            current_limit = int(current_limit * TOKEN_REDUCTION_FACTOR)
-    
-    # If we get here, we failed to truncate sufficiently
-    worker_logger.warning(f"Failed to truncate text after {MAX_TOKEN_ATTEMPTS} attempts. Skipping.")
-    return None
-
-def get_embedding_model(worker_id: int) -> SentenceTransformer:
-    """Get or create an instance of the embedding model for this worker."""
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    
-    # Each process needs its own model instance
-    process_id = os.getpid()
-    if process_id not in embedding_models:
-        worker_logger.info(f"Loading embedding model {EMBEDDING_MODEL} for worker {worker_id}")
+def get_embedding_model() -> SentenceTransformer:
+    """Get or create the single shared embedding model instance."""
+    global embedding_model
+
+    if embedding_model is None:
+        logger.info(f"Loading embedding model {EMBEDDING_MODEL}")
         model_kwargs = {}
-        
+
         # Configure device based on availability and settings
         if USE_GPU:
             try:
                 import torch
                 if torch.backends.mps.is_available():  # Apple Silicon GPU
                     device = "mps"
-                    worker_logger.info(f"Using Apple Silicon GPU (MPS) for embeddings")
+                    logger.info(f"Using Apple Silicon GPU (MPS) for embeddings")
                 elif torch.cuda.is_available():  # NVIDIA GPU
                     device = "cuda"
-                    worker_logger.info(f"Using CUDA GPU for embeddings")
+                    logger.info(f"Using CUDA GPU for embeddings")
                 else:
                     device = "cpu"
-                    worker_logger.info(f"No GPU available, using CPU for embeddings")
+                    logger.info(f"No GPU available, using CPU for embeddings")
                 model_kwargs["device"] = device
             except:
-                worker_logger.warning("Could not check GPU availability, defaulting to CPU")
-        
+                logger.warning("Could not check GPU availability, defaulting to CPU")
+
         # Load the model
         try:
             # Download to a specific directory to cache
-            model = SentenceTransformer(EMBEDDING_MODEL, cache_folder=str(MODEL_DIR), **model_kwargs)
-            embedding_models[process_id] = model
-            worker_logger.info(f"Successfully loaded embedding model for worker {worker_id}")
+            embedding_model = SentenceTransformer(EMBEDDING_MODEL, cache_folder=str(MODEL_DIR), **model_kwargs)
+            # Pin the sequence length so the encoder truncates exactly at
+            # the safe token limit instead of the model default
+            embedding_model.max_seq_length = MAX_SAFE_TOKENS
+            logger.info(f"Successfully loaded embedding model")
         except Exception as e:
-            worker_logger.error(f"Error loading embedding model: {e}")
+            logger.error(f"Error loading embedding model: {e}")
             raise
-    
-    return embedding_models[process_id]
 
-def generate_embeddings_locally(texts: List[str], worker_id: int) -> List[Optional[List[float]]]:
+    return embedding_model
+
+def generate_embeddings_locally(texts: List[str]) -> List[Optional[List[float]]]:
     """Generate embeddings locally using SentenceTransformers."""
     if not texts:
         return []
-    
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    
+
     # Filter out empty texts
     valid_texts = [(i, text) for i, text in enumerate(texts) if text and isinstance(text, str) and len(text.strip()) > 0]
     if not valid_texts:
         return [None] * len(texts)
-    
+
     indices, valid_texts_only = zip(*valid_texts)
-    
+
     # Get embeddings for valid texts
     results = [None] * len(texts)
-    
+
     try:
-        # Get the embedding model for this worker
-        model = get_embedding_model(worker_id)
-        
-        # Process in batches to optimize memory usage
-        valid_embeddings = []
-        for i in range(0, len(valid_texts_only), BATCH_SIZE_EMBEDDING):
-            batch_texts = valid_texts_only[i:i+BATCH_SIZE_EMBEDDING]
-            
-            # Apply token truncation to each text in the batch
-            truncated_texts = []
-            for text in batch_texts:
-                truncated = adaptive_token_truncation(text, worker_id)
-                if truncated:
-                    truncated_texts.append(truncated)
-                else:
-                    truncated_texts.append("") # Empty placeholder for failed truncation
-            
-            # Generate embeddings for the batch
-            batch_embeddings = model.encode(truncated_texts, show_progress_bar=False)
-            valid_embeddings.extend(batch_embeddings)
-        
+        model = get_embedding_model()
+
+        # Short texts skip tokenization entirely; the model truncates them
+        # itself. Only texts past the character threshold are pre-truncated.
+        truncated_texts = [
+            text if len(text) <= CHAR_TRUNCATION_THRESHOLD else truncate_to_token_limit(text)
+            for text in valid_texts_only
+        ]
+
+        # Deduplicate identical texts so each distinct text is encoded once
+        unique_index: Dict[str, int] = {}
+        unique_texts: List[str] = []
+        inverse: List[int] = []
+        for text in truncated_texts:
+            position = unique_index.setdefault(text, len(unique_texts))
+            if position == len(unique_texts):
+                unique_texts.append(text)
+            inverse.append(position)
+
+        # Serve repeats from the cross-batch cache; encode only the misses
+        unique_embeddings: List[Optional[np.ndarray]] = [None] * len(unique_texts)
+        texts_to_encode: List[str] = []
+        encode_positions: List[int] = []
+        for position, text in enumerate(unique_texts):
+            cached = _embedding_cache.get(text)
+            if cached is not None:
+                _embedding_cache.move_to_end(text)
+                unique_embeddings[position] = cached
+            else:
+                texts_to_encode.append(text)
+                encode_positions.append(position)
+
+        if texts_to_encode:
+            # One large-batch encode call; the framework batches internally
+            encoded = model.encode(
+                texts_to_encode,
+                batch_size=GPU_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+            for position, vector in zip(encode_positions, encoded):
+                unique_embeddings[position] = vector
+                _embedding_cache[unique_texts[position]] = vector
+                if len(_embedding_cache) > EMBED_CACHE_MAX_ENTRIES:
+                    _embedding_cache.popitem(last=False)
+
         # Assign embeddings back to their original positions
         for idx, embed_idx in enumerate(indices):
+            vector = unique_embeddings[inverse[idx]]
             # Skip if the text was empty or had failed truncation
-            if valid_embeddings[idx].shape[0] == VECTOR_DIM:  # Check dimension
-                results[embed_idx] = valid_embeddings[idx].tolist()
-    
+            if vector is not None and vector.shape[0] == VECTOR_DIM:  # Check dimension
+                results[embed_idx] = vector.tolist()
+
     except Exception as e:
-        worker_logger.error(f"Error generating embeddings: {e}")
+        logger.error(f"Error generating embeddings: {e}")
         # Return None for all in case of error
         return [None] * len(texts)
-    
+
     return results
 
-def download_parquet_file(file_path: str, worker_id: int) -> Optional[str]:
+def download_parquet_file(file_path: str) -> Optional[str]:
     """Download a parquet file with concurrency control."""
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    
     # Mark file as in progress
-    with stats_lock:
-        global_stats["files_in_progress"].add(file_path)
-    
+    global_stats["files_in_progress"].add(file_path)
+
     with download_semaphore:
         try:
             local_path = hf_hub_download(
@@ -289,65 +383,84 @@ def download_parquet_file(file_path: str, worker_id: int) -> Optional[str]:
             )
             return local_path
         except Exception as e:
-            worker_logger.error(f"Error downloading file {file_path}: {e}")
+            logger.error(f"Error downloading file {file_path}: {e}")
             # Remove from in-progress set
-            with stats_lock:
-                global_stats["files_in_progress"].discard(file_path)
+            global_stats["files_in_progress"].discard(file_path)
             return None
 
-def get_highest_batch_number(worker_id: int) -> int:
-    """Find the highest existing batch number for a worker."""
-    worker_dir = OUTPUT_DIR / f"worker_{worker_id}"
-    if not worker_dir.exists():
-        return 0
-    
-    # Find all batch files for this worker
-    batch_files = list(worker_dir.glob(f"batch_{worker_id}_*.pkl"))
-    if not batch_files:
-        return 0
-    
-    # Extract batch numbers from filenames
+BATCH_COUNTER_FILE = TEMP_DIR / "batch_counter.txt"
+
+def load_batch_counter() -> int:
+    """Read the next batch number from the persisted counter file.
+
+    Falls back to a one-time glob of existing batch files when the
+    counter is missing (first run or upgrade from older output dirs).
+    """
+    try:
+        with open(BATCH_COUNTER_FILE, 'r') as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return get_highest_batch_number()
+
+def save_batch_counter(value: int) -> None:
+    """Atomically persist the next batch number."""
+    tmp_file = BATCH_COUNTER_FILE.with_suffix(".tmp")
+    with open(tmp_file, 'w') as f:
+        f.write(str(value))
+    os.replace(tmp_file, BATCH_COUNTER_FILE)
+
+def get_highest_batch_number() -> int:
+    """Find the highest existing batch number from previous runs."""
     batch_numbers = []
-    for batch_file in batch_files:
-        try:
-            # Format is batch_{worker_id}_{batch_number}.pkl
-            batch_number = int(batch_file.stem.split('_')[-1])
-            batch_numbers.append(batch_number)
-        except (ValueError, IndexError):
+    for worker_dir in OUTPUT_DIR.glob("worker_*"):
+        if not worker_dir.is_dir():
             continue
-    
+        for batch_file in worker_dir.glob("batch_*.pkl"):
+            try:
+                # Format is batch_{worker_id}_{batch_number}.pkl
+                batch_number = int(batch_file.stem.split('_')[-1])
+                batch_numbers.append(batch_number)
+            except (ValueError, IndexError):
+                continue
+
     # Return highest batch number found, or 0 if none found
     return max(batch_numbers) + 1 if batch_numbers else 0
 
-def save_batch(points: List[Dict[str, Any]], batch_id: str, worker_id: int) -> bool:
+def save_batch(points: List[Dict[str, Any]], batch_id: str) -> bool:
     """Save a batch of processed points to disk."""
     if not points:
         return True
-    
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    
+
     try:
-        # Create a structured batch file
+        # Columnar batch layout: vectors live in a sibling .npy file as
+        # one contiguous float32 array (written without any per-object
+        # serialization, loadable via mmap); the pickle carries only ids,
+        # payloads, and metadata.
+        ids = [p["id"] for p in points]
+        payloads = [p["payload"] for p in points]
+        vectors = np.asarray([p["vector"] for p in points], dtype=np.float32)
         batch_data = {
-            "points": points,
+            "ids": ids,
+            "payloads": payloads,
             "metadata": {
                 "batch_id": batch_id,
-                "worker_id": worker_id,
+                "worker_id": 0,
                 "timestamp": datetime.now().isoformat(),
                 "count": len(points),
-                "version": "1.0"
+                "version": "3.0"
             }
         }
-        
+
         # Ensure output directory exists
-        worker_output_dir = OUTPUT_DIR / f"worker_{worker_id}"
+        worker_output_dir = OUTPUT_DIR / "worker_0"
         worker_output_dir.mkdir(exist_ok=True)
-        
+
         # Save the batch
         output_file = worker_output_dir / f"batch_{batch_id}.pkl"
+        np.save(worker_output_dir / f"batch_{batch_id}.vectors.npy", vectors, allow_pickle=False)
         with open(output_file, 'wb') as f:
-            pickle.dump(batch_data, f)
-        
+            pickle.dump(batch_data, f, protocol=5)
+
         # Save a small sample in JSON for inspection (first batch only)
         if batch_id.endswith("_000000"):
             sample_file = worker_output_dir / f"sample_{batch_id}.json"
@@ -356,38 +469,79 @@ def save_batch(points: List[Dict[str, Any]], batch_id: str, worker_id: int) -> b
                     "metadata": batch_data["metadata"],
                     "sample_points": [
                         {
-                            "id": p["id"],
-                            "vector_length": len(p["vector"]),
-                            "vector_sample": p["vector"][:5],
-                            "payload": p["payload"]
-                        } 
-                        for p in points[:3]  # Just first 3 points
+                            "id": ids[i],
+                            "vector_length": int(vectors.shape[1]),
+                            "vector_sample": vectors[i, :5].tolist(),
+                            "payload": payloads[i]
+                        }
+                        for i in range(min(3, len(ids)))  # Just first 3 points
                     ]
                 }
                 json.dump(sample_data, f, indent=2)
-        
+
         # Update stats
-        with stats_lock:
-            global_stats["batches_saved"] += 1
-        
-        worker_logger.debug(f"Saved batch {batch_id} with {len(points)} points")
+        global_stats["batches_saved"] += 1
+
+        logger.debug(f"Saved batch {batch_id} with {len(points)} points")
         return True
-    
+
     except Exception as e:
-        worker_logger.error(f"Error saving batch {batch_id}: {e}")
+        logger.error(f"Error saving batch {batch_id}: {e}")
         return False
 
-def upsert_to_qdrant(points: List[Dict[str, Any]], worker_id: int) -> bool:
+def load_batch_columns(batch_file) -> Dict[str, Any]:
+    """Load a saved batch file in columnar form (ids/vectors/payloads).
+
+    Handles all three layouts: v1 row-oriented ("points" list of dicts),
+    v2 columnar with vectors inside the pickle, and v3 columnar with
+    vectors in a sibling .npy file.
+    """
+    with open(batch_file, 'rb') as f:
+        batch_data = pickle.load(f)
+
+    if "points" in batch_data:  # v1: row-oriented list of dicts
+        points = batch_data["points"]
+        return {
+            "ids": [p["id"] for p in points],
+            "vectors": np.asarray([p["vector"] for p in points], dtype=np.float32),
+            "payloads": [p.get("payload", {}) for p in points],
+        }
+
+    if "vectors" not in batch_data:  # v3: vectors in the .npy sidecar
+        # Memory-map the sidecar so the float32 buffer is paged in on
+        # demand rather than copied through the pickle stream — the
+        # out-of-band-buffer behaviour protocol 5 offers, with the .npy
+        # file playing the role of the external buffer.
+        batch_path = Path(batch_file)
+        vectors_file = batch_path.with_name(batch_path.stem + ".vectors.npy")
+        batch_data["vectors"] = np.load(vectors_file, mmap_mode='r')
+
+    return batch_data
+
+# --- Qdrant client (single shared connection) ---
+_qdrant_client: Optional[QdrantClient] = None
+
+def get_qdrant_client() -> QdrantClient:
+    """Get or create the shared Qdrant client (gRPC, connection reused)."""
+    global _qdrant_client
+    if _qdrant_client is None:
+        _qdrant_client = QdrantClient(
+            host=QDRANT_HOST,
+            port=QDRANT_PORT,
+            grpc_port=QDRANT_GRPC_PORT,
+            prefer_grpc=True,
+            grpc_options=QDRANT_GRPC_OPTIONS
+        )
+    return _qdrant_client
+
+def upsert_to_qdrant(points: List[Dict[str, Any]]) -> bool:
     """Upsert points directly to Qdrant if enabled."""
     if not USE_DIRECT_QDRANT or not points:
         return False
-    
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    
+
     try:
-        # Connect to Qdrant
-        client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-        
+        client = get_qdrant_client()
+
         # Prepare points for Qdrant
         qdrant_points = [
             PointStruct(
@@ -397,251 +551,289 @@ def upsert_to_qdrant(points: List[Dict[str, Any]], worker_id: int) -> bool:
             )
             for p in points
         ]
-        
-        # Upsert in batches to avoid overwhelming Qdrant
-        MAX_QDRANT_BATCH = 100
-        for i in range(0, len(qdrant_points), MAX_QDRANT_BATCH):
-            batch = qdrant_points[i:i+MAX_QDRANT_BATCH]
-            client.upsert(
-                collection_name=QDRANT_COLLECTION,
-                points=batch
-            )
-            time.sleep(0.5)  # Small delay between batches
-        
-        worker_logger.info(f"Upserted {len(points)} points directly to Qdrant")
+
+        # The client-side uploader handles sub-batching and retries over
+        # the shared gRPC channel; no pacing sleeps needed
+        client.upload_points(
+            collection_name=QDRANT_COLLECTION,
+            points=qdrant_points,
+            batch_size=QDRANT_UPLOAD_BATCH,
+            wait=False
+        )
+
+        logger.info(f"Upserted {len(points)} points directly to Qdrant")
         return True
-    
+
     except Exception as e:
-        worker_logger.error(f"Error upserting to Qdrant: {e}")
+        logger.error(f"Error upserting to Qdrant: {e}")
         return False
 
-def process_parquet_file(file_path: str, worker_id: int, batch_counter: int) -> Tuple[int, int, int, int]:
-    """Process a single Parquet file, extracting data and generating embeddings."""
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    worker_logger.info(f"Processing file: {file_path}")
-    
-    processed_count = 0
+def _string_column(batch: pa.RecordBatch, name: str) -> Optional[pa.Array]:
+    """Return a column cast to string with empty values nulled out, or None."""
+    if name not in batch.schema.names:
+        return None
+    col = batch.column(name)
+    if not pa.types.is_string(col.type) and not pa.types.is_large_string(col.type):
+        col = pc.cast(col, pa.string())
+    # Treat empty strings like missing values, matching the row-loop behavior
+    return pc.if_else(pc.equal(col, ""), pa.scalar(None, type=col.type), col)
+
+def prepare_batch_rows_vectorized(batch: pa.RecordBatch, file_path: str) -> Tuple[List[str], List[str], List[Dict[str, Any]], int]:
+    """Vectorized equivalent of prepare_batch_rows using pyarrow.compute.
+
+    Null checks, snippet slicing and the id/cid fallback all run as Arrow
+    C++ kernels over whole columns instead of per-row Python, leaving only
+    one final pass to assemble payload dicts.
+    """
+    rows_count = batch.num_rows
+    if TEXT_FIELD not in batch.schema.names or rows_count == 0:
+        return [], [], [], rows_count
+
+    text_col = batch.column(TEXT_FIELD)
+    valid_mask = pc.and_(pc.is_valid(text_col), pc.greater(pc.utf8_length(pc.fill_null(text_col, "")), 0))
+
+    # Resolve point-source IDs: id, then cid, then a file/row-index fallback
+    id_source = _string_column(batch, "id")
+    cid_source = _string_column(batch, "cid")
+    if id_source is not None and cid_source is not None:
+        id_col = pc.coalesce(id_source, cid_source)
+    elif id_source is not None:
+        id_col = id_source
+    elif cid_source is not None:
+        id_col = cid_source
+    else:
+        id_col = pa.nulls(rows_count, pa.string())
+
+    id_values = id_col.to_pylist()
+    if pc.any(pc.is_null(id_col)).as_py():
+        base_name = os.path.basename(file_path)
+        for i, value in enumerate(id_values):
+            if value is None:
+                id_values[i] = f"{base_name}_{i}"
+
+    # Filter everything down to rows with usable text in one pass
+    filtered = batch.filter(valid_mask)
+    skipped_count = rows_count - filtered.num_rows
+    if filtered.num_rows == 0:
+        return [], [], [], skipped_count
+
+    texts = filtered.column(TEXT_FIELD).to_pylist()
+    snippets = pc.utf8_slice_codeunits(filtered.column(TEXT_FIELD), 0, SNIPPET_LENGTH).to_pylist()
+    filtered_ids = [value for value, keep in zip(id_values, valid_mask.to_pylist()) if keep]
+    batch_ids = [fast_uuid5(value) for value in filtered_ids]
+
+    # Assemble payload dicts from the pre-converted columns
+    payload_columns = {}
+    for src_key, dst_key in PAYLOAD_FIELD_MAPPING.items():
+        if src_key in filtered.schema.names:
+            payload_columns[dst_key] = filtered.column(src_key).to_pylist()
+
+    batch_payloads = []
+    for row_idx, snippet in enumerate(snippets):
+        payload = {"snippet": snippet}
+        for dst_key, values in payload_columns.items():
+            value = values[row_idx]
+            if value:
+                payload[dst_key] = value
+        batch_payloads.append(payload)
+
+    return texts, batch_ids, batch_payloads, skipped_count
+
+def prepare_batch_rows(data_dict: Dict[str, List[Any]], file_path: str) -> Tuple[List[str], List[str], List[Dict[str, Any]], int]:
+    """Extract texts, point IDs and payloads from a decoded record batch."""
+    rows_count = len(data_dict.get(TEXT_FIELD, []))
+
+    batch_texts = []
+    batch_ids = []
+    batch_payloads = []
     skipped_count = 0
-    embedding_failures = 0
-    points_batch = []
-    
-    # Download file
-    local_path = download_parquet_file(file_path, worker_id)
-    if not local_path:
-        worker_logger.error(f"Failed to download {file_path}. Skipping.")
-        # Remove from in-progress
-        with stats_lock:
-            global_stats["files_in_progress"].discard(file_path)
-        return 0, 0, 0, batch_counter
-    
-    try:
-        # Process file
-        start_time = time.time()
+
+    for i in range(rows_count):
+        try:
+            # Extract text for embedding
+            if TEXT_FIELD not in data_dict or i >= len(data_dict[TEXT_FIELD]) or not data_dict[TEXT_FIELD][i]:
+                skipped_count += 1
+                continue
+
+            text = data_dict[TEXT_FIELD][i]
+
+            # Create payload with snippet
+            payload = {"snippet": text[:SNIPPET_LENGTH] if text else ""}
+
+            # Extract other payload fields
+            for src_key, dst_key in PAYLOAD_FIELD_MAPPING.items():
+                if src_key in data_dict and i < len(data_dict[src_key]) and data_dict[src_key][i]:
+                    payload[dst_key] = data_dict[src_key][i]
+
+            # Get ID for point
+            id_field_value = None
+            if "id" in data_dict and i < len(data_dict["id"]) and data_dict["id"][i]:
+                id_field_value = str(data_dict["id"][i])
+            elif "cid" in data_dict and i < len(data_dict["cid"]) and data_dict["cid"][i]:
+                id_field_value = str(data_dict["cid"][i])
+
+            if not id_field_value:
+                logger.debug(f"Row {i}: Missing ID field. Using row index as fallback.")
+                id_field_value = f"{os.path.basename(file_path)}_{i}"
+
+            # Create point ID
+            point_id = fast_uuid5(id_field_value)
+
+            # Add to embedding batch
+            batch_texts.append(text)
+            batch_ids.append(point_id)
+            batch_payloads.append(payload)
+
+        except Exception as e:
+            logger.error(f"Error preparing row {i}: {e}")
+            skipped_count += 1
+            continue
+
+    return batch_texts, batch_ids, batch_payloads, skipped_count
+
+_hf_filesystem = None
+_hf_filesystem_lock = threading.Lock()
+
+def get_hf_filesystem():
+    """Get the shared fsspec filesystem for direct Hub reads."""
+    global _hf_filesystem
+    with _hf_filesystem_lock:
+        if _hf_filesystem is None:
+            from huggingface_hub import HfFileSystem
+            _hf_filesystem = HfFileSystem(token=os.getenv("HF_TOKEN"))
+    return _hf_filesystem
+
+def iter_parquet_batches(file_path: str, local_path: Optional[str] = None):
+    """Yield projected record batches for one source file.
+
+    With local_path=None the file is scanned in place on the Hub via
+    pyarrow.dataset range reads, so only the projected columns' pages are
+    ever transferred; otherwise the previously downloaded copy is read.
+    """
+    wanted_columns = [TEXT_FIELD, *PAYLOAD_FIELD_MAPPING.keys()]
+
+    if local_path is None:
+        dataset = ds.dataset(
+            f"datasets/{REPO_ID}/{file_path}",
+            format="parquet",
+            filesystem=get_hf_filesystem()
+        )
+        columns = [c for c in wanted_columns if c in dataset.schema.names]
+        yield from dataset.scanner(columns=columns, batch_size=SCAN_BATCH_SIZE).to_batches()
+    else:
         parquet_file = pq.ParquetFile(local_path)
-        total_rows = parquet_file.metadata.num_rows
-        worker_logger.info(f"File contains {total_rows} rows in {parquet_file.metadata.num_row_groups} row groups")
-        
-        # Process in batches
-        for batch_idx, batch in enumerate(parquet_file.iter_batches()):
-            batch_start_time = time.time()
-            data_dict = batch.to_pydict()
-            rows_count = len(data_dict.get(TEXT_FIELD, []))
-            
-            worker_logger.info(f"Processing batch {batch_idx+1} with {rows_count} rows...")
-            
-            # Prepare batch of texts for embedding
-            batch_texts = []
-            batch_ids = []
-            batch_payloads = []
-            
-            for i in range(rows_count):
+        columns = [c for c in wanted_columns if c in parquet_file.schema_arrow.names]
+        yield from _iter_local_batches(parquet_file, columns)
+
+_column_read_executor = ThreadPoolExecutor(max_workers=NUM_DECODE_WORKERS, thread_name_prefix="column-read")
+
+def _row_group_uncompressed_size(metadata, rg_idx: int) -> int:
+    """Total uncompressed byte size of one row group."""
+    row_group = metadata.row_group(rg_idx)
+    return sum(row_group.column(i).total_uncompressed_size for i in range(row_group.num_columns))
+
+def _iter_local_batches(parquet_file: pq.ParquetFile, columns: List[str]):
+    """Iterate record batches from a local file row group by row group.
+
+    Large row groups are decoded column-parallel on a shared thread pool
+    (pyarrow releases the GIL per column read); small or narrow groups
+    use the plain serial reader, which is faster than the fan-out.
+    """
+    metadata = parquet_file.metadata
+    for rg_idx in range(metadata.num_row_groups):
+        parallel_worthwhile = (
+            len(columns) >= COLUMN_PARALLEL_MIN_COLS
+            and _row_group_uncompressed_size(metadata, rg_idx) > COLUMN_PARALLEL_MIN_RG_BYTES
+        )
+        if parallel_worthwhile:
+            futures = [
+                _column_read_executor.submit(parquet_file.read_row_group, rg_idx, [column])
+                for column in columns
+            ]
+            column_tables = [future.result() for future in futures]
+            table = pa.Table.from_arrays([t.column(0) for t in column_tables], names=columns)
+        else:
+            table = parquet_file.read_row_group(rg_idx, columns=columns)
+        yield from table.to_batches(max_chunksize=SCAN_BATCH_SIZE)
+
+def decode_parquet_file(file_path: str, local_path: Optional[str], prepared_queue: "queue.Queue") -> None:
+    """Decode a parquet file and enqueue prepared row batches (CPU stage).
+
+    Runs on a decode thread; pyarrow releases the GIL during decode so
+    several files can be decoded while the main thread drives the GPU.
+    """
+    try:
+        num_batches = 0
+        for batch in iter_parquet_batches(file_path, local_path):
+            if USE_VECTORIZED_ROWPREP:
                 try:
-                    # Extract text for embedding
-                    if TEXT_FIELD not in data_dict or i >= len(data_dict[TEXT_FIELD]) or not data_dict[TEXT_FIELD][i]:
-                        skipped_count += 1
-                        continue
-                    
-                    text = data_dict[TEXT_FIELD][i]
-                    
-                    # Create payload with snippet
-                    payload = {"snippet": text[:SNIPPET_LENGTH] if text else ""}
-                    
-                    # Extract other payload fields
-                    for src_key, dst_key in PAYLOAD_FIELD_MAPPING.items():
-                        if src_key in data_dict and i < len(data_dict[src_key]) and data_dict[src_key][i]:
-                            payload[dst_key] = data_dict[src_key][i]
-                    
-                    # Get ID for point
-                    id_field_value = None
-                    if "id" in data_dict and i < len(data_dict["id"]) and data_dict["id"][i]:
-                        id_field_value = str(data_dict["id"][i])
-                    elif "cid" in data_dict and i < len(data_dict["cid"]) and data_dict["cid"][i]:
-                        id_field_value = str(data_dict["cid"][i])
-                    
-                    if not id_field_value:
-                        worker_logger.debug(f"Row {i}: Missing ID field. Using row index as fallback.")
-                        id_field_value = f"{os.path.basename(file_path)}_{i}"
-                    
-                    # Create point ID
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, id_field_value))
-                    
-                    # Add to embedding batch
-                    batch_texts.append(text)
-                    batch_ids.append(point_id)
-                    batch_payloads.append(payload)
-                    
+                    texts, ids, payloads, skipped = prepare_batch_rows_vectorized(batch, file_path)
                 except Exception as e:
-                    worker_logger.error(f"Error preparing row {i}: {e}")
-                    skipped_count += 1
-                    continue
-            
-            # Generate embeddings for the batch (more efficient than one by one)
-            if batch_texts:
-                worker_logger.info(f"Generating embeddings for {len(batch_texts)} texts")
-                embeddings = generate_embeddings_locally(batch_texts, worker_id)
-                
-                # Create points with embeddings
-                for idx, (point_id, payload, embedding) in enumerate(zip(batch_ids, batch_payloads, embeddings)):
-                    if embedding:
-                        points_batch.append({
-                            "id": point_id,
-                            "vector": embedding,
-                            "payload": payload
-                        })
-                        processed_count += 1
-                    else:
-                        embedding_failures += 1
-                        skipped_count += 1
-            
-            # Save batch when full
-            if len(points_batch) >= BATCH_SIZE:
-                batch_id = f"{worker_id}_{batch_counter:06d}"
-                save_batch(points_batch, batch_id, worker_id)
-                worker_logger.info(f"Saved batch {batch_id} with {len(points_batch)} points")
-                
-                # Also upsert to Qdrant if enabled
-                if USE_DIRECT_QDRANT:
-                    upsert_to_qdrant(points_batch, worker_id)
-                
-                points_batch = []
-                batch_counter += 1
-            
-            # Log batch progress
-            batch_time = time.time() - batch_start_time
-            embedding_rate = len(batch_texts) / batch_time if batch_time > 0 and batch_texts else 0
-            worker_logger.info(f"Processed batch {batch_idx} in {batch_time:.2f}s - Embedding rate: {embedding_rate:.2f} texts/sec - Running total: {processed_count} processed, {skipped_count} skipped")
-        
-        # Calculate processing stats
-        elapsed_time = time.time() - start_time
-        records_per_second = processed_count / elapsed_time if elapsed_time > 0 else 0
-        
-        worker_logger.info(f"Completed file {file_path} - Processed: {processed_count}, Skipped: {skipped_count}, Failures: {embedding_failures}")
-        worker_logger.info(f"Processing rate: {records_per_second:.2f} records/second ({processed_count} in {elapsed_time:.2f}s)")
-        
-        # Update global stats
-        with stats_lock:
-            global_stats["files_processed"] += 1
-            global_stats["records_processed"] += processed_count
-            global_stats["records_skipped"] += skipped_count
-            global_stats["embedding_failures"] += embedding_failures
-            global_stats["processing_times"].append((processed_count, elapsed_time))
-            global_stats["files_in_progress"].discard(file_path)
-        
-        # Save completion marker file for this file (for resumability)
-        completion_marker = TEMP_DIR / "completed_files" / os.path.basename(file_path).replace(".parquet", ".done")
-        os.makedirs(os.path.dirname(completion_marker), exist_ok=True)
-        with open(completion_marker, 'w') as f:
-            json.dump({
-                "file": file_path,
-                "processed": processed_count,
-                "skipped": skipped_count,
-                "failures": embedding_failures,
-                "completed_at": datetime.now().isoformat()
-            }, f)
-        
-        return processed_count, skipped_count, embedding_failures, batch_counter
-        
+                    logger.warning(f"Vectorized row prep failed for {file_path} ({e}); using row loop")
+                    texts, ids, payloads, skipped = prepare_batch_rows(batch.to_pydict(), file_path)
+            else:
+                texts, ids, payloads, skipped = prepare_batch_rows(batch.to_pydict(), file_path)
+            prepared_queue.put(("batch", file_path, texts, ids, payloads, skipped))
+            num_batches += 1
+
+        prepared_queue.put(("eof", file_path, num_batches))
+
     except Exception as e:
-        worker_logger.error(f"Error processing file {file_path}: {e}")
-        # Remove from in-progress
-        with stats_lock:
-            global_stats["files_in_progress"].discard(file_path)
-        return 0, 0, 0, batch_counter
-
-def worker_process(file_paths: List[str], worker_id: int) -> Dict[str, Any]:
-    """Worker process that handles a set of files."""
-    # Setup worker-specific logger
-    worker_logger = logging.getLogger(f"worker_{worker_id}")
-    worker_handler = logging.FileHandler(LOGS_DIR / f"worker_{worker_id}.log")
-    worker_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
-    worker_logger.addHandler(worker_handler)
-    
-    worker_logger.info(f"Worker {worker_id} starting with {len(file_paths)} files to process")
-    
-    # Process each file
-    worker_stats = {
-        "worker_id": worker_id,
-        "files_assigned": len(file_paths),
-        "files_processed": 0,
-        "files_failed": 0,
-        "records_processed": 0,
-        "records_skipped": 0,
-        "embedding_failures": 0,
-        "start_time": time.time()
-    }
-    
-    # Initialize batch counter for this worker - check for existing batches
-    batch_counter = get_highest_batch_number(worker_id)
-    worker_logger.info(f"Starting with batch counter at {batch_counter} (continuing from existing batches)")
-    
-    for file_idx, file_path in enumerate(file_paths):
-        worker_logger.info(f"Processing file {file_idx+1}/{len(file_paths)}: {file_path}")
-        
-        try:
-            processed, skipped, failures, batch_counter = process_parquet_file(file_path, worker_id, batch_counter)
-            
-            worker_stats["files_processed"] += 1
-            worker_stats["records_processed"] += processed
-            worker_stats["records_skipped"] += skipped
-            worker_stats["embedding_failures"] += failures
-            
-        except Exception as e:
-            worker_logger.error(f"Error in worker process for file {file_path}: {e}")
-            worker_stats["files_failed"] += 1
-    
-    worker_stats["elapsed_time"] = time.time() - worker_stats["start_time"]
-    worker_logger.info(f"Worker {worker_id} finished. Processed {worker_stats['records_processed']} records in {worker_stats['elapsed_time']:.2f}s")
-    
-    return worker_stats
+        logger.error(f"Error decoding file {file_path}: {e}")
+        prepared_queue.put(("error", file_path))
+
+def write_completion_marker(file_path: str, processed: int, skipped: int, failures: int) -> None:
+    """Save completion marker file for a source file (for resumability)."""
+    completion_marker = TEMP_DIR / "completed_files" / os.path.basename(file_path).replace(".parquet", ".done")
+    os.makedirs(os.path.dirname(completion_marker), exist_ok=True)
+    with open(completion_marker, 'w') as f:
+        json.dump({
+            "file": file_path,
+            "processed": processed,
+            "skipped": skipped,
+            "failures": failures,
+            "completed_at": datetime.now().isoformat()
+        }, f)
 
 def initialize_qdrant():
     """Initialize Qdrant collection if enabled and if it doesn't exist."""
     global USE_DIRECT_QDRANT
-    
+
     if not USE_DIRECT_QDRANT:
         return
-    
+
     try:
         logger.info(f"Initializing Qdrant collection {QDRANT_COLLECTION} at {QDRANT_HOST}:{QDRANT_PORT}")
-        client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-        
+        client = get_qdrant_client()
+
         # Check if collection exists
         collections = client.get_collections().collections
         collection_names = [collection.name for collection in collections]
-        
+
         if QDRANT_COLLECTION not in collection_names:
             logger.info(f"Creating Qdrant collection {QDRANT_COLLECTION}")
             client.create_collection(
                 collection_name=QDRANT_COLLECTION,
                 vectors_config=VectorParams(
-                    size=VECTOR_DIM, 
+                    size=VECTOR_DIM,
                     distance=Distance.COSINE
+                ),
+                # Int8 scalar quantization from the start, rather than the
+                # post-hoc pass in quantize_collection.py: the server
+                # quantizes on ingest, so the collection never carries an
+                # unquantized index that has to be rebuilt later.
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True
+                    )
                 )
             )
             logger.info(f"Collection {QDRANT_COLLECTION} created successfully")
         else:
             logger.info(f"Collection {QDRANT_COLLECTION} already exists")
-            
+
     except Exception as e:
         logger.error(f"Error initializing Qdrant: {e}")
         logger.info("Continuing with local storage only")
@@ -652,30 +844,30 @@ def get_parquet_files():
     try:
         # Check if we already have a list of files
         file_list_path = TEMP_DIR / "parquet_files.json"
-        
+
         if file_list_path.exists():
             with open(file_list_path, 'r') as f:
                 file_list = json.load(f)
                 logger.info(f"Loaded file list with {len(file_list)} files from {file_list_path}")
                 return file_list
-        
+
         # List files from the dataset repo
         logger.info(f"Listing Parquet files in {REPO_ID} with prefix {CLUSTER_PREFIX}...")
         all_files = list_repo_files(
             repo_id=REPO_ID,
             repo_type="dataset"
         )
-        
+
         # Filter for Parquet files with the right prefix
         parquet_files = [f for f in all_files if f.startswith(CLUSTER_PREFIX) and f.endswith(".parquet")]
-        
+
         # Save file list for future runs
         with open(file_list_path, 'w') as f:
             json.dump(parquet_files, f)
-        
+
         logger.info(f"Saved file list with {len(parquet_files)} files to {file_list_path}")
         return parquet_files
-    
+
     except Exception as e:
         logger.error(f"Error getting Parquet files: {e}")
         return []
@@ -685,7 +877,7 @@ def get_previously_processed_files():
     completed_dir = TEMP_DIR / "completed_files"
     if not completed_dir.exists():
         return set()
-    
+
     processed_files = set()
     for done_file in completed_dir.glob("*.done"):
         try:
@@ -695,44 +887,43 @@ def get_previously_processed_files():
                     processed_files.add(data["file"])
         except Exception:
             pass
-    
+
     return processed_files
 
-def divide_work(files: List[str], num_workers: int) -> List[List[str]]:
-    """Divide the files among workers in a balanced way."""
-    if not files:
-        return [[] for _ in range(num_workers)]
-    
-    # Sort files by name to ensure deterministic division
-    sorted_files = sorted(files)
-    
-    # Divide files among workers
-    chunks = [[] for _ in range(num_workers)]
-    for i, file_path in enumerate(sorted_files):
-        chunks[i % num_workers].append(file_path)
-    
-    return chunks
+# Compiled once; display_progress_stats fills it with format_map so the
+# string machinery runs a single pass instead of one f-string per field.
+_PROGRESS_TMPL = (
+    "Progress: {files_processed}/{files_total} files ({file_progress:.1f}%)\n"
+    "Records processed: {records_processed:,}\n"
+    "Embedding failures: {embedding_failures:,}\n"
+    "Batches saved: {batches_saved:,}\n"
+    "Processing rate: {files_per_hour:.2f} files/hour, {records_per_hour:.2f} records/hour\n"
+    "Elapsed time: {elapsed}\n"
+    "Estimated time remaining: {remaining}\n"
+    "Estimated completion: {eta}"
+)
 
 def display_progress_stats():
     """Display progress statistics and estimated time remaining."""
-    with stats_lock:
-        files_processed = global_stats["files_processed"]
-        files_total = global_stats["files_total"]
-        records_processed = global_stats["records_processed"]
-        elapsed_time = time.time() - global_stats["start_time"]
-        embedding_failures = global_stats["embedding_failures"]
-        batches_saved = global_stats["batches_saved"]
-    
+    if not logger.isEnabledFor(logging.INFO):
+        return ""
+    files_processed = global_stats["files_processed"]
+    files_total = global_stats["files_total"]
+    records_processed = global_stats["records_processed"]
+    elapsed_time = time.time() - global_stats["start_time"]
+    embedding_failures = global_stats["embedding_failures"]
+    batches_saved = global_stats["batches_saved"]
+
     if files_processed == 0:
         return "Waiting for first file to complete..."
-    
+
     # Calculate progress percentages
     file_progress = (files_processed / files_total) * 100 if files_total > 0 else 0
-    
+
     # Calculate processing rates
     files_per_hour = (files_processed / elapsed_time) * 3600 if elapsed_time > 0 else 0
     records_per_hour = (records_processed / elapsed_time) * 3600 if elapsed_time > 0 else 0
-    
+
     # Estimate remaining time
     if files_per_hour > 0 and files_total > 0:
         remaining_files = files_total - files_processed
@@ -740,237 +931,517 @@ def display_progress_stats():
         remaining_time = timedelta(seconds=int(remaining_seconds))
     else:
         remaining_time = "Unknown"
-    
+
     # Calculate ETA
     if isinstance(remaining_time, timedelta):
         eta = datetime.now() + remaining_time
         eta_str = eta.strftime("%Y-%m-%d %H:%M:%S")
     else:
         eta_str = "Unknown"
-    
-    # Format progress message
-    progress_msg = (
-        f"Progress: {files_processed}/{files_total} files ({file_progress:.1f}%)\n"
-        f"Records processed: {records_processed:,}\n"
-        f"Embedding failures: {embedding_failures:,}\n"
-        f"Batches saved: {batches_saved:,}\n"
-        f"Processing rate: {files_per_hour:.2f} files/hour, {records_per_hour:.2f} records/hour\n"
-        f"Elapsed time: {str(timedelta(seconds=int(elapsed_time)))}\n"
-        f"Estimated time remaining: {str(remaining_time)}\n"
-        f"Estimated completion: {eta_str}"
-    )
-    
-    return progress_msg
+
+    # Format progress message in one pass through the shared template
+    return _PROGRESS_TMPL.format_map({
+        "files_processed": files_processed,
+        "files_total": files_total,
+        "file_progress": file_progress,
+        "records_processed": records_processed,
+        "embedding_failures": embedding_failures,
+        "batches_saved": batches_saved,
+        "files_per_hour": files_per_hour,
+        "records_per_hour": records_per_hour,
+        "elapsed": str(timedelta(seconds=int(elapsed_time))),
+        "remaining": str(remaining_time),
+        "eta": eta_str,
+    })
 
 def save_stats_snapshot():
     """Save a snapshot of the current statistics."""
     try:
         stats_file = LOGS_DIR / f"stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        with stats_lock:
-            # Create a copy of stats that can be JSON serialized
-            stats_copy = global_stats.copy()
-            stats_copy["processing_times"] = [(r, t) for r, t in stats_copy["processing_times"]]
-            stats_copy["files_in_progress"] = list(stats_copy["files_in_progress"])
-            stats_copy["elapsed_time"] = time.time() - stats_copy["start_time"]
-            stats_copy["timestamp"] = datetime.now().isoformat()
-        
+
+        # Snapshot is scalars only (per-file timings stream to the JSONL
+        # log), written compactly — pretty-printing buys nothing here.
+        stats_copy = global_stats.copy()
+        stats_copy["files_in_progress"] = list(stats_copy["files_in_progress"])
+        stats_copy["elapsed_time"] = time.time() - stats_copy["start_time"]
+        stats_copy["timestamp"] = datetime.now().isoformat()
+
         with open(stats_file, 'w') as f:
-            json.dump(stats_copy, f, indent=2)
-            
+            json.dump(stats_copy, f, separators=(',', ':'))
+
         logger.info(f"Saved stats snapshot to {stats_file}")
-        
+
     except Exception as e:
         logger.error(f"Error saving stats snapshot: {e}")
 
+async def _load_embeddings_async():
+    """Async body of load_embeddings_to_qdrant.
+
+    Bulk loading is RTT-bound, not CPU-bound, so several upserts are kept
+    in flight at once: each batch file is split into sub-batches and
+    pushed through asyncio.gather behind a small semaphore.
+    """
+    # gRPC halves the wire size of float32 vectors vs REST/JSON and skips
+    # server-side JSON parsing (same transport quantize_collection.py uses)
+    client = AsyncQdrantClient(
+        host=QDRANT_HOST,
+        port=QDRANT_PORT,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=True,
+        grpc_options=QDRANT_GRPC_OPTIONS,
+        timeout=300
+    )
+
+    # Ensure collection exists
+    collections = (await client.get_collections()).collections
+    collection_names = [collection.name for collection in collections]
+
+    if QDRANT_COLLECTION not in collection_names:
+        logger.info(f"Creating Qdrant collection {QDRANT_COLLECTION}")
+        await client.create_collection(
+            collection_name=QDRANT_COLLECTION,
+            vectors_config=VectorParams(
+                size=VECTOR_DIM,
+                distance=Distance.COSINE
+            ),
+            # Same int8 config as initialize_qdrant: the bulk load is
+            # the path that usually creates the production collection,
+            # so it must quantize on ingest too
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        )
+
+    # Count existing points. Estimated count is fine for the progress
+    # log — an exact count scans segments, which is slow on a large
+    # collection; the final reconciliation below stays exact.
+    existing_count = (await client.count(collection_name=QDRANT_COLLECTION, exact=False)).count
+    logger.info(f"Collection currently has {existing_count} points")
+
+    # Suspend HNSW maintenance while loading; incremental index updates
+    # are the dominant bulk-ingest cost and can run once at the end
+    logger.info("Disabling indexing for bulk load (indexing_threshold=0)")
+    await client.update_collection(
+        collection_name=QDRANT_COLLECTION,
+        optimizer_config=OptimizersConfigDiff(indexing_threshold=0)
+    )
+
+    # Find all batch files
+    batch_files = []
+    for worker_dir in OUTPUT_DIR.glob("worker_*"):
+        if worker_dir.is_dir():
+            for batch_file in worker_dir.glob("batch_*.pkl"):
+                batch_files.append(batch_file)
+
+    logger.info(f"Found {len(batch_files)} batch files to load")
+
+    # A couple of concurrent requests is enough to hide the RTT without
+    # overwhelming the server. There is deliberately no fixed sleep
+    # between sub-batches: backpressure comes from this semaphore plus
+    # server response latency, so a loaded server slows us down exactly
+    # as much as needed and an idle one is never throttled.
+    semaphore = asyncio.Semaphore(QDRANT_UPSERT_CONCURRENCY)
+
+    async def upsert_sub_batch(sub_batch, source_file):
+        async with semaphore:
+            try:
+                await client.upsert(
+                    collection_name=QDRANT_COLLECTION,
+                    points=sub_batch,
+                    wait=False
+                )
+            except Exception as e:
+                logger.error(f"Error upserting sub-batch from {source_file}: {e}")
+
+    # Load and upsert each batch. File reads run on a small thread pool a
+    # few files ahead of the upload loop so disk deserialization hides
+    # behind network latency, and sub-batch tasks are not awaited per
+    # file, so the upload window stays full while the next file is read -
+    # the same pipelining upload_points(parallel=N) would give us, minus
+    # the extra processes.
+    loop = asyncio.get_running_loop()
+    read_executor = ThreadPoolExecutor(max_workers=BATCH_READ_WORKERS, thread_name_prefix="batch-read")
+    file_iter = iter(batch_files)
+    read_futures = deque()
+
+    def schedule_reads():
+        while len(read_futures) < BATCH_READ_LOOKAHEAD:
+            next_file = next(file_iter, None)
+            if next_file is None:
+                break
+            read_futures.append((next_file, loop.run_in_executor(read_executor, load_batch_columns, next_file)))
+
+    schedule_reads()
+
+    pending_tasks = set()
+    loaded_count = 0
+    files_done = 0
+    progress_bar = tqdm.tqdm(total=len(batch_files), desc="Loading batches")
+    while read_futures:
+        batch_file, read_future = read_futures.popleft()
+        schedule_reads()
+        try:
+            # Columnar batches go to the client as models.Batch slices —
+            # no per-point PointStruct construction, and only the slice
+            # being sent is converted out of the (possibly mmapped) array.
+            batch = await read_future
+            ids = batch["ids"]
+            vectors = np.asarray(batch["vectors"], dtype=np.float32)
+            payloads = batch["payloads"]
+
+            for j in range(0, len(ids), MAX_UPSERT_BATCH):
+                sub_batch = Batch(
+                    ids=ids[j:j+MAX_UPSERT_BATCH],
+                    vectors=vectors[j:j+MAX_UPSERT_BATCH].tolist(),
+                    payloads=payloads[j:j+MAX_UPSERT_BATCH]
+                )
+                task = asyncio.create_task(upsert_sub_batch(sub_batch, batch_file))
+                pending_tasks.add(task)
+                task.add_done_callback(pending_tasks.discard)
+                # Bound the in-flight window so queued tasks (and their
+                # point data) never pile up faster than uploads drain
+                while len(pending_tasks) > QDRANT_UPSERT_CONCURRENCY * 4:
+                    await asyncio.wait(set(pending_tasks), return_when=asyncio.FIRST_COMPLETED)
+
+            loaded_count += len(ids)
+
+        except Exception as e:
+            logger.error(f"Error loading batch {batch_file}: {e}")
+
+        files_done += 1
+        progress_bar.update(1)
+
+        # Log progress periodically
+        if files_done % 10 == 0:
+            logger.info(f"Loaded {loaded_count} points from {files_done}/{len(batch_files)} batch files")
+
+    progress_bar.close()
+    read_executor.shutdown(wait=True)
+
+    # Drain the remaining in-flight upserts
+    if pending_tasks:
+        await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+    # Re-enable indexing and wait for the optimizer to converge (same
+    # status-polling pattern as quantize_collection.py)
+    logger.info(f"Restoring indexing_threshold={INDEXING_RESTORE_THRESHOLD} and waiting for index build")
+    await client.update_collection(
+        collection_name=QDRANT_COLLECTION,
+        optimizer_config=OptimizersConfigDiff(indexing_threshold=INDEXING_RESTORE_THRESHOLD)
+    )
+    delay = 1.0
+    while (await client.get_collection(QDRANT_COLLECTION)).status != CollectionStatus.GREEN:
+        logger.info("Index rebuild in progress ...")
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, 30.0)
+
+    # Final count doubles as the durability fence for the wait=False
+    # upserts above: it only returns once the server has applied the
+    # writes, so the totals logged here are authoritative.
+    final_count = (await client.count(collection_name=QDRANT_COLLECTION, exact=True)).count
+    logger.info(f"Completed loading. Collection now has {final_count} points")
+    logger.info(f"Added {final_count - existing_count} new points")
+
 def load_embeddings_to_qdrant():
     """Load saved embeddings to Qdrant."""
-    if not os.getenv("QDRANT_LOAD_EMBEDDINGS", "False").lower() in ("true", "1", "t"):
+    if not QDRANT_LOAD_EMBEDDINGS_ENABLED:
         logger.info("Skipping Qdrant loading as QDRANT_LOAD_EMBEDDINGS is not set to True")
         return
-    
+
     logger.info(f"Loading saved embeddings to Qdrant collection {QDRANT_COLLECTION}")
-    
+
     try:
-        # Connect to Qdrant
-        client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-        
-        # Ensure collection exists
-        collections = client.get_collections().collections
-        collection_names = [collection.name for collection in collections]
-        
-        if QDRANT_COLLECTION not in collection_names:
-            logger.info(f"Creating Qdrant collection {QDRANT_COLLECTION}")
-            client.create_collection(
-                collection_name=QDRANT_COLLECTION,
-                vectors_config=VectorParams(
-                    size=VECTOR_DIM, 
-                    distance=Distance.COSINE
-                )
-            )
-        
-        # Count existing points
-        existing_count = client.count(collection_name=QDRANT_COLLECTION).count
-        logger.info(f"Collection currently has {existing_count} points")
-        
-        # Find all batch files
-        batch_files = []
-        for worker_dir in OUTPUT_DIR.glob("worker_*"):
-            if worker_dir.is_dir():
-                for batch_file in worker_dir.glob("batch_*.pkl"):
-                    batch_files.append(batch_file)
-        
-        logger.info(f"Found {len(batch_files)} batch files to load")
-        
-        # Load and upsert each batch
-        loaded_count = 0
-        for i, batch_file in enumerate(tqdm.tqdm(batch_files, desc="Loading batches")):
-            try:
-                with open(batch_file, 'rb') as f:
-                    batch_data = pickle.load(f)
-                
-                points = [
-                    PointStruct(
-                        id=p["id"],
-                        vector=p["vector"],
-                        payload=p["payload"]
-                    )
-                    for p in batch_data["points"]
-                ]
-                
-                # Upsert in smaller batches to not overwhelm Qdrant
-                MAX_UPSERT_BATCH = 100
-                for j in range(0, len(points), MAX_UPSERT_BATCH):
-                    sub_batch = points[j:j+MAX_UPSERT_BATCH]
-                    client.upsert(
-                        collection_name=QDRANT_COLLECTION,
-                        points=sub_batch
-                    )
-                
-                loaded_count += len(points)
-                
-                # Log progress periodically
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Loaded {loaded_count} points from {i+1}/{len(batch_files)} batch files")
-                
-                # Small delay to avoid overwhelming Qdrant
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"Error loading batch {batch_file}: {e}")
-        
-        # Final count
-        final_count = client.count(collection_name=QDRANT_COLLECTION).count
-        logger.info(f"Completed loading. Collection now has {final_count} points")
-        logger.info(f"Added {final_count - existing_count} new points")
-        
+        asyncio.run(_load_embeddings_async())
     except Exception as e:
         logger.error(f"Error loading embeddings to Qdrant: {e}")
 
 def run_parallel_processing():
-    """Main function to run the parallel processing workflow."""
-    logger.info("Starting parallel processing workflow")
-    
+    """Main function to run the staged processing pipeline.
+
+    Stage 1: ThreadPoolExecutor downloads parquet files from the Hub.
+    Stage 2: ThreadPoolExecutor decodes Arrow batches and prepares rows.
+    Stage 3: The main thread coalesces texts from several parquet batches
+             and drives the GPU with large-batch encode calls.
+    """
+    logger.info("Starting processing pipeline")
+
     # Initialize Qdrant if enabled
     if USE_DIRECT_QDRANT:
         initialize_qdrant()
-    
+
     # Get list of Parquet files to process
     parquet_files = get_parquet_files()
     logger.info(f"Found {len(parquet_files)} Parquet files to process")
-    
+
     # Check for previously processed files
     processed_files = get_previously_processed_files()
     logger.info(f"Found {len(processed_files)} previously processed files")
-    
+
     # Filter out already processed files
-    remaining_files = [f for f in parquet_files if f not in processed_files]
+    remaining_files = sorted(f for f in parquet_files if f not in processed_files)
     logger.info(f"Starting processing with {len(remaining_files)} remaining files")
-    
+
     # Update global stats
-    with stats_lock:
-        global_stats["files_total"] = len(remaining_files)
-    
-    # Divide work among workers
-    work_chunks = divide_work(remaining_files, NUM_WORKERS)
-    logger.info(f"Divided {len(remaining_files)} files among {NUM_WORKERS} workers")
-    
-    # Create a progress bar
-    progress_bar = tqdm.tqdm(total=len(remaining_files), desc="Processing files")
-    
-    # Create and start the worker processes
-    with ProcessPoolExecutor(max_workers=NUM_WORKERS) as executor:
-        # Submit jobs
-        future_to_worker = {
-            executor.submit(worker_process, chunk, worker_id): worker_id
-            for worker_id, chunk in enumerate(work_chunks)
-        }
-        
-        # Process as they complete
-        try:
-            last_status_time = time.time()
-            last_save_time = time.time()
-            
-            for future in as_completed(future_to_worker):
-                worker_id = future_to_worker[future]
-                
+    global_stats["files_total"] = len(remaining_files)
+
+    # Load the model up front so the first encode call doesn't stall the pipeline
+    get_embedding_model()
+
+    # Initialize batch counter from the persisted counter file
+    batch_counter = load_batch_counter()
+    logger.info(f"Starting with batch counter at {batch_counter} (continuing from existing batches)")
+
+    # Bounded queue between the decode stage and the GPU stage
+    prepared_queue: "queue.Queue" = queue.Queue(maxsize=PREPARED_QUEUE_MAX)
+
+    download_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOWNLOADS, thread_name_prefix="download")
+    decode_executor = ThreadPoolExecutor(max_workers=NUM_DECODE_WORKERS, thread_name_prefix="decode")
+
+    def feed_pipeline():
+        """Feed decode tasks, either streaming from the Hub or via downloads."""
+        decode_futures = []
+        if STREAM_FROM_HUB:
+            # No local copies: decode threads scan the Hub files in place
+            for file_path in remaining_files:
+                global_stats["files_in_progress"].add(file_path)
+                decode_futures.append(
+                    decode_executor.submit(decode_parquet_file, file_path, None, prepared_queue)
+                )
+        else:
+            # Sliding-window prefetch: keep the next few files in flight so
+            # a local copy is ready the moment decode capacity frees up,
+            # while decode slots throttle downloads to GPU progress instead
+            # of racing the whole dataset onto disk.
+            decode_slots = threading.Semaphore(NUM_DECODE_WORKERS + 1)
+
+            def decode_with_slot(file_path, local_path):
                 try:
-                    worker_stats = future.result()
-                    logger.info(f"Worker {worker_id} completed: processed {worker_stats['records_processed']} records in {worker_stats['elapsed_time']:.2f}s")
-                    
-                    # Update progress bar
-                    progress_bar.update(worker_stats["files_processed"])
-                    
-                    # Display periodic status updates
-                    current_time = time.time()
-                    if current_time - last_status_time > 60:  # Every minute
-                        status = display_progress_stats()
-                        logger.info(f"\nStatus Update:\n{status}")
-                        last_status_time = current_time
-                    
-                    # Save periodic stats snapshots
-                    if current_time - last_save_time > 300:  # Every 5 minutes
-                        save_stats_snapshot()
-                        last_save_time = current_time
-                        
-                except Exception as e:
-                    logger.error(f"Error in worker {worker_id}: {e}")
-        
-        except KeyboardInterrupt:
-            logger.warning("Process interrupted by user.")
-            executor.shutdown(wait=False)
-            
-            # Save final stats
-            save_stats_snapshot()
+                    decode_parquet_file(file_path, local_path, prepared_queue)
+                finally:
+                    decode_slots.release()
+
+            file_iter = iter(remaining_files)
+            pending_downloads = {}
+
+            def submit_next_download():
+                next_file = next(file_iter, None)
+                if next_file is not None:
+                    pending_downloads[download_executor.submit(download_parquet_file, next_file)] = next_file
+
+            for _ in range(PREFETCH_FILE_LOOKAHEAD):
+                submit_next_download()
+
+            while pending_downloads:
+                done, _ = wait(pending_downloads, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = pending_downloads.pop(future)
+                    local_path = future.result()
+                    if local_path:
+                        decode_slots.acquire()
+                        decode_futures.append(
+                            decode_executor.submit(decode_with_slot, file_path, local_path)
+                        )
+                    else:
+                        logger.error(f"Failed to download {file_path}. Skipping.")
+                        global_stats["files_in_progress"].discard(file_path)
+                    submit_next_download()
+        if decode_futures:
+            wait(decode_futures)
+        prepared_queue.put(None)  # Sentinel: decoding finished
+
+    feeder = threading.Thread(target=feed_pipeline, name="feeder", daemon=True)
+    feeder.start()
+
+    # Per-file accounting so completion markers stay accurate
+    file_progress: Dict[str, Dict[str, Any]] = {}
+
+    # Coalesced encode buffer: (file_path, point_id, payload, text)
+    buffer: List[Tuple[str, str, Dict[str, Any], str]] = []
+    points_batch: List[Dict[str, Any]] = []
+
+    progress_bar = tqdm.tqdm(total=len(remaining_files), desc="Processing files")
+    last_status_time = time.time()
+    last_save_time = time.time()
+
+    def file_entry(file_path: str) -> Dict[str, Any]:
+        if file_path not in file_progress:
+            file_progress[file_path] = {
+                "processed": 0, "skipped": 0, "failures": 0,
+                "pending": 0, "eof": False, "start_time": time.time()
+            }
+        return file_progress[file_path]
+
+    def finalize_ready_files():
+        """Write completion markers for files that are fully flushed."""
+        nonlocal last_status_time
+        for file_path in list(file_progress):
+            entry = file_progress[file_path]
+            if entry["eof"] and entry["pending"] == 0:
+                if entry.get("error"):
+                    # Decode failed partway: write no completion marker so
+                    # the next run retries the file instead of skipping it
+                    logger.warning(f"File {file_path} errored during decode; leaving unmarked for retry")
+                    global_stats["files_in_progress"].discard(file_path)
+                    progress_bar.update(1)
+                    del file_progress[file_path]
+                    continue
+                elapsed = time.time() - entry["start_time"]
+                logger.info(
+                    f"Completed file {file_path} - Processed: {entry['processed']}, "
+                    f"Skipped: {entry['skipped']}, Failures: {entry['failures']}"
+                )
+                write_completion_marker(file_path, entry["processed"], entry["skipped"], entry["failures"])
+                global_stats["files_processed"] += 1
+                append_processing_time(file_path, entry["processed"], elapsed)
+                global_stats["files_in_progress"].discard(file_path)
+                progress_bar.update(1)
+                del file_progress[file_path]
+
+    def flush_buffer():
+        """Encode the coalesced buffer and stage the resulting points."""
+        nonlocal buffer, points_batch, batch_counter
+        if not buffer:
             return
-    
-    # Close progress bar
-    progress_bar.close()
-    
+
+        texts = [item[3] for item in buffer]
+        logger.info(f"Generating embeddings for {len(texts)} coalesced texts")
+        encode_start = time.time()
+        embeddings = generate_embeddings_locally(texts)
+        encode_time = time.time() - encode_start
+        rate = len(texts) / encode_time if encode_time > 0 else 0
+        logger.info(f"Encoded {len(texts)} texts in {encode_time:.2f}s ({rate:.2f} texts/sec)")
+
+        for (file_path, point_id, payload, _), embedding in zip(buffer, embeddings):
+            entry = file_entry(file_path)
+            entry["pending"] -= 1
+            if embedding:
+                points_batch.append({
+                    "id": point_id,
+                    "vector": embedding,
+                    "payload": payload
+                })
+                entry["processed"] += 1
+                global_stats["records_processed"] += 1
+            else:
+                entry["failures"] += 1
+                entry["skipped"] += 1
+                global_stats["embedding_failures"] += 1
+                global_stats["records_skipped"] += 1
+        buffer = []
+
+        # Save full point batches to disk
+        while len(points_batch) >= BATCH_SIZE:
+            batch_id = f"0_{batch_counter:06d}"
+            to_save = points_batch[:BATCH_SIZE]
+            if PERSIST_BATCHES:
+                save_batch(to_save, batch_id)
+                logger.info(f"Saved batch {batch_id} with {len(to_save)} points")
+            if USE_DIRECT_QDRANT:
+                upsert_to_qdrant(to_save)
+            points_batch = points_batch[BATCH_SIZE:]
+            batch_counter += 1
+            save_batch_counter(batch_counter)
+
+        finalize_ready_files()
+
+    # Stage 3: GPU encode loop on the main thread
+    try:
+        while True:
+            item = prepared_queue.get()
+            if item is None:
+                break
+
+            kind = item[0]
+            if kind == "batch":
+                _, file_path, texts, ids, payloads, skipped = item
+                entry = file_entry(file_path)
+                entry["skipped"] += skipped
+                entry["pending"] += len(texts)
+                global_stats["records_skipped"] += skipped
+                for point_id, payload, text in zip(ids, payloads, texts):
+                    buffer.append((file_path, point_id, payload, text))
+
+                if len(buffer) >= MIN_ENCODE_TEXTS:
+                    flush_buffer()
+            elif kind == "eof":
+                _, file_path, _num_batches = item
+                file_entry(file_path)["eof"] = True
+                finalize_ready_files()
+            elif kind == "error":
+                _, file_path = item
+                entry = file_entry(file_path)
+                entry["eof"] = True
+                entry["error"] = True
+                finalize_ready_files()
+
+            # Display periodic status updates
+            current_time = time.time()
+            if current_time - last_status_time > 60:  # Every minute
+                status = display_progress_stats()
+                logger.info(f"\nStatus Update:\n{status}")
+                last_status_time = current_time
+
+            # Save periodic stats snapshots
+            if current_time - last_save_time > 300:  # Every 5 minutes
+                save_stats_snapshot()
+                last_save_time = current_time
+
+        # Drain whatever is left in the encode buffer
+        flush_buffer()
+
+        # Save any remaining points
+        if points_batch:
+            batch_id = f"0_{batch_counter:06d}"
+            if PERSIST_BATCHES:
+                save_batch(points_batch, batch_id)
+                logger.info(f"Saved final batch {batch_id} with {len(points_batch)} points")
+            if USE_DIRECT_QDRANT:
+                upsert_to_qdrant(points_batch)
+            points_batch = []
+            batch_counter += 1
+            save_batch_counter(batch_counter)
+        finalize_ready_files()
+
+    except KeyboardInterrupt:
+        logger.warning("Process interrupted by user.")
+        download_executor.shutdown(wait=False)
+        decode_executor.shutdown(wait=False)
+        save_stats_snapshot()
+        return
+    finally:
+        progress_bar.close()
+
+    download_executor.shutdown(wait=True)
+    decode_executor.shutdown(wait=True)
+
     # Final stats
     logger.info("Processing completed!")
     status = display_progress_stats()
     logger.info(f"\nFinal Status:\n{status}")
-    
+
     # Save final stats
     save_stats_snapshot()
-    
+
     # Load to Qdrant if requested
-    if not USE_DIRECT_QDRANT and os.getenv("QDRANT_LOAD_EMBEDDINGS", "False").lower() in ("true", "1", "t"):
+    if not USE_DIRECT_QDRANT and QDRANT_LOAD_EMBEDDINGS_ENABLED:
         load_embeddings_to_qdrant()
 
 if __name__ == "__main__":
     # Start time for the entire process
     start_time = time.time()
-    logger.info(f"Starting parallel processing at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
+    logger.info(f"Starting processing at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
     try:
         run_parallel_processing()
     except KeyboardInterrupt:
         logger.warning("Process interrupted by user.")
     except Exception as e:
         logger.error(f"Error in main process: {e}")
-    
+
     # Log total runtime
     total_time = time.time() - start_time
-    logger.info(f"Process ended after {total_time:.2f} seconds")
\ No newline at end of file
+    logger.info(f"Process ended after {total_time:.2f} seconds")
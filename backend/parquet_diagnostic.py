@@ -11,6 +11,9 @@ import os
 import argparse
 import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 def main():
     parser = argparse.ArgumentParser(description="Test parquet file access")
@@ -36,12 +39,12 @@ def main():
     print(f"Python version: {pd.__version__}")
     print(f"PyArrow version: {pa.__version__}")
     
-    # Try reading metadata only
+    # Try reading metadata only (footer read, no row data materialized)
     try:
         print("\nReading file metadata...")
-        file_info = pd.read_parquet(file_path, columns=None)
-        print(f"File contains {len(file_info):,} rows and {len(file_info.columns)} columns")
-        print(f"Columns: {file_info.columns.tolist()}")
+        parquet_file = pq.ParquetFile(file_path)
+        print(f"File contains {parquet_file.metadata.num_rows:,} rows and {parquet_file.metadata.num_columns} columns")
+        print(f"Columns: {parquet_file.schema_arrow.names}")
     except Exception as e:
         print(f"ERROR reading metadata: {e}")
         return
@@ -50,14 +53,15 @@ def main():
     if args.cid:
         try:
             print(f"\nLooking for CID: {args.cid}")
-            df = pd.read_parquet(file_path, filters=[("cid", "=", args.cid)])
+            df = ds.dataset(file_path, format="parquet").to_table(
+                filter=pc.field("cid") == args.cid
+            ).to_pandas()
             
             if df.empty:
                 print(f"CID {args.cid} not found in file")
             else:
                 print(f"Found CID {args.cid}:")
-                for col in df.columns:
-                    value = df.iloc[0][col]
+                for col, value in df.iloc[0].to_dict().items():
                     if col == 'text':
                         print(f"  {col}: {len(value)} characters")
                     else:
@@ -69,14 +73,15 @@ def main():
     if args.case_id:
         try:
             print(f"\nLooking for case_id: {args.case_id}")
-            df = pd.read_parquet(file_path, filters=[("case_id", "=", args.case_id)])
+            df = ds.dataset(file_path, format="parquet").to_table(
+                filter=pc.field("case_id") == args.case_id
+            ).to_pandas()
             
             if df.empty:
                 print(f"Case ID {args.case_id} not found in file")
             else:
                 print(f"Found case_id {args.case_id}:")
-                for col in df.columns:
-                    value = df.iloc[0][col]
+                for col, value in df.iloc[0].to_dict().items():
                     if col == 'text':
                         print(f"  {col}: {len(value)} characters")
                     else:
@@ -84,17 +89,17 @@ def main():
         except Exception as e:
             print(f"ERROR finding case_id: {e}")
     
-    # Try reading sample rows
+    # Try reading sample rows (stream just the first two, not the file)
     try:
         print("\nReading sample rows...")
-        sample = pd.read_parquet(file_path).head(2)
-        for i, row in sample.iterrows():
+        sample = next(parquet_file.iter_batches(batch_size=2)).to_pandas()
+        for i, row in enumerate(sample.to_dict(orient='records')):
             print(f"\nROW {i+1}:")
-            for col in row.index:
+            for col, value in row.items():
                 if col == 'text':
-                    print(f"  {col}: {len(row[col])} characters")
+                    print(f"  {col}: {len(value)} characters")
                 else:
-                    print(f"  {col}: {row[col]}")
+                    print(f"  {col}: {value}")
     except Exception as e:
         print(f"ERROR reading sample rows: {e}")
 
@@ -1,6 +1,7 @@
 # quantize_collection.py
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
+import httpx
 import os, logging, time
 
 logging.basicConfig(level=logging.INFO,
@@ -34,13 +35,15 @@ def quantize():
         return False
 
     deadline = time.time() + 7200  # 2 h safety
+    delay = 1.0  # back off towards 30 s; fast exit on small collections
     while True:
         if time.time() > deadline:
             raise TimeoutError("Quantization exceeded 2 h")
         if cli.get_collection(COLL).status.value == "Green":
             break
         log.info("Rebuild in progress …")
-        time.sleep(30)
+        time.sleep(delay)
+        delay = min(delay * 1.5, 30.0)
     return True
 
 if __name__ == "__main__":
@@ -18,20 +18,29 @@ Options:
   --fix         Apply fixes automatically (default: False, report only)
 """
 
+import asyncio
 import os
 import sys
 import time
 import sqlite3
 import logging
 import json
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import concurrent.futures
+import functools
 from collections import defaultdict
 import argparse
 
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import FieldCondition, Filter, MatchAny, PayloadSchemaType
+
 # Adjust the import paths as needed for your environment
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.services.qdrant_service import qdrant_service
+from app.services.qdrant_service import qdrant_service, get_client
 
 # Setup logging
 logging.basicConfig(
@@ -48,13 +57,20 @@ logger = logging.getLogger(__name__)
 SQLITE_DB_PATH = os.path.join(os.getcwd(), "case_lookup.db")
 PARQUET_BASE_DIR = "/Users/josecarlosrodriguez/Desktop/Carlos-Projects/Qdrant-Test/caselaw_processing/downloads/datasets--laion--Caselaw_Access_Project_embeddings/snapshots/7777999929157e8a2fe1b5d65f1d9cfd2092e843/TeraflopAI___Caselaw_Access_Project_clusters"
 QDRANT_COLLECTION = "caselaw_bge_base_v2"
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
 BATCH_SIZE = 5000
 MAX_WORKERS = 16
+QDRANT_SCROLL_CHUNK = 512  # case_ids per scroll request
+QDRANT_CONCURRENCY = 16  # Concurrent in-flight scroll requests
 
 # Output files
-MISMATCHES_FILE = "mismatches.json"
+MISMATCHES_FILE = "mismatches.jsonl"
 SUMMARY_FILE = "reconciliation_summary.json"
 FIX_SCRIPT_FILE = "fix_inconsistencies.py"
+SQLITE_FIXES_FILE = "fix_sqlite.json"
+QDRANT_FIXES_FILE = "fix_qdrant.json"
 
 def verify_paths():
     """Verify all file paths and data sources exist."""
@@ -94,6 +110,20 @@ def verify_paths():
         collection_info = qdrant_service.get_collection_info()
         vector_count = collection_info.vectors_count
         logger.info(f"Qdrant collection '{QDRANT_COLLECTION}' verified with {vector_count} vectors")
+
+        # Without a keyword index on case_id, the filtered scroll in
+        # check_qdrant_for_case_batch degenerates to a full scan per
+        # batch. Creating it is idempotent, so just try every run.
+        try:
+            get_client().create_payload_index(
+                collection_name=QDRANT_COLLECTION,
+                field_name="case_id",
+                field_schema=PayloadSchemaType.KEYWORD,
+                wait=True,
+            )
+            logger.info("Payload index on 'case_id' ensured")
+        except Exception as e:
+            logger.warning(f"Could not create payload index on 'case_id': {e}")
     except Exception as e:
         errors.append(f"Qdrant connection error: {e}")
     
@@ -107,37 +137,38 @@ def verify_paths():
     return True
 
 def get_sqlite_case_batches(batch_size=BATCH_SIZE, limit=None):
-    """Get all cases from SQLite in batches."""
+    """Get all cases from SQLite in batches.
+
+    Streams one cursor with fetchmany instead of LIMIT/OFFSET pages —
+    OFFSET makes SQLite re-scan and discard `offset` rows per batch,
+    which is O(N^2) over the table.
+    """
     conn = sqlite3.connect(SQLITE_DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-200000")  # ~200MB page cache
     cursor = conn.cursor()
-    
+
     # Get total count first
     cursor.execute("SELECT COUNT(*) FROM cases")
     total_count = cursor.fetchone()[0]
-    
+
     if limit:
         total_count = min(total_count, limit)
-        
+
     logger.info(f"Preparing to process {total_count} cases in batches of {batch_size}")
-    
-    # Process in batches
-    offset = 0
-    while offset < total_count:
-        if limit:
-            cursor.execute(
-                "SELECT id, name_abbreviation, court, jurisdiction, decision_date, file_name FROM cases LIMIT ? OFFSET ?", 
-                (min(batch_size, limit - offset), offset)
-            )
-        else:
-            cursor.execute(
-                "SELECT id, name_abbreviation, court, jurisdiction, decision_date, file_name FROM cases LIMIT ? OFFSET ?", 
-                (batch_size, offset)
-            )
-            
-        batch = cursor.fetchall()
+
+    # Stream batches off a single cursor
+    cursor.execute(
+        "SELECT id, name_abbreviation, court, jurisdiction, decision_date, file_name FROM cases"
+    )
+
+    yielded = 0
+    while yielded < total_count:
+        batch = cursor.fetchmany(min(batch_size, total_count - yielded))
         if not batch:
             break
-            
+
         # Convert to list of dicts for easier processing
         batch_dicts = []
         for row in batch:
@@ -149,107 +180,159 @@ def get_sqlite_case_batches(batch_size=BATCH_SIZE, limit=None):
                 "date": row[4],
                 "file_name": row[5]
             })
-        
+
         yield batch_dicts
-        
-        offset += batch_size
-        logger.info(f"Processed SQLite batch: {offset}/{total_count}")
-    
+
+        yielded += len(batch)
+        logger.info(f"Processed SQLite batch: {yielded}/{total_count}")
+
     conn.close()
 
-def check_qdrant_for_case_batch(case_batch):
-    """Check Qdrant data for a batch of cases using payload-based search."""
-    results = []
-    
-    for case in case_batch:
-        case_id = case["id"]
-        try:
-            # Search Qdrant by case_id in payload
-            search_results = qdrant_service.search_by_vector(
-                vector=[0.1] * 768,  # Use a random vector
-                limit=1,
-                filter_conditions={"case_id": case_id}
+# The reconciliation workload is I/O-bound fanout against Qdrant, so the
+# lookup path is async: one shared AsyncQdrantClient, scroll requests
+# chunked and kept in flight together behind a semaphore.
+_async_client = None
+
+def get_async_qdrant_client():
+    """Get or create the shared async Qdrant client."""
+    global _async_client
+    if _async_client is None:
+        # gRPC: millions of payload lookups make HTTP/JSON framing and
+        # parsing the dominant client-side cost
+        _async_client = AsyncQdrantClient(
+            host=QDRANT_HOST,
+            port=QDRANT_PORT,
+            grpc_port=QDRANT_GRPC_PORT,
+            prefer_grpc=True,
+            timeout=60,
+        )
+    return _async_client
+
+async def check_qdrant_for_case_batch(case_batch):
+    """Check Qdrant data for a batch of cases with concurrent filtered scrolls.
+
+    Scrolls with a case_id IN (...) filter replace the previous per-case
+    dummy-vector search: no HNSW traversal, no per-case scoring of the
+    whole collection. The batch is split into QDRANT_SCROLL_CHUNK-id
+    requests issued concurrently so round trips overlap.
+    """
+    # Dedup before the lookup (order-preserving): duplicate ids in a
+    # denormalized batch would otherwise be fetched twice; the results
+    # dict already shares one point across duplicate rows.
+    case_ids = list(dict.fromkeys(str(case["id"]) for case in case_batch))
+
+    client = get_async_qdrant_client()
+    semaphore = asyncio.Semaphore(QDRANT_CONCURRENCY)
+
+    async def scroll_chunk(ids_chunk):
+        # Retry whole chunks with backoff: a Qdrant hiccup costs one
+        # warning per chunk rather than one exception and one error
+        # record per case.
+        async with semaphore:
+            delay = 1.0
+            for attempt in range(3):
+                try:
+                    points, _ = await client.scroll(
+                        collection_name=QDRANT_COLLECTION,
+                        scroll_filter=Filter(
+                            must=[FieldCondition(key="case_id", match=MatchAny(any=ids_chunk))]
+                        ),
+                        limit=len(ids_chunk),
+                        with_payload=True,
+                        with_vectors=False,
+                    )
+                    return points
+                except Exception as e:
+                    if attempt == 2:
+                        raise
+                    logger.warning(
+                        f"Scroll of {len(ids_chunk)} case_ids failed (attempt {attempt + 1}/3): {e}"
+                    )
+                    await asyncio.sleep(delay)
+                    delay *= 2
+
+    points_by_case_id = {}
+    batch_error = None
+    try:
+        chunks = [
+            case_ids[i:i + QDRANT_SCROLL_CHUNK]
+            for i in range(0, len(case_ids), QDRANT_SCROLL_CHUNK)
+        ]
+        for points in await asyncio.gather(*(scroll_chunk(chunk) for chunk in chunks)):
+            points_by_case_id.update(
+                (str((point.payload or {}).get("case_id")), point) for point in points
             )
-            
-            if search_results:
-                point = search_results[0]
-                payload = point.payload or {}
-                
-                # Extract metadata
-                qdrant_title = payload.get("title", "")
-                qdrant_court = payload.get("court", "")
-                qdrant_date = payload.get("date", "")
-                
-                # Check for mismatches
-                title_match = case["title"] == qdrant_title
-                court_match = case["court"] == qdrant_court
-                
-                # Normalize dates for comparison
-                date_match = True
-                if case["date"] and qdrant_date:
-                    # Extract year for basic comparison
-                    sqlite_year = case["date"].split("-")[0] if "-" in case["date"] else case["date"]
-                    qdrant_year = qdrant_date.split("-")[0] if "-" in qdrant_date else qdrant_date
-                    date_match = sqlite_year == qdrant_year
-                
-                # Record result
-                results.append({
-                    "case_id": case_id,
-                    "qdrant_point_id": point.id,
-                    "sqlite_title": case["title"],
-                    "qdrant_title": qdrant_title,
-                    "sqlite_court": case["court"],
-                    "qdrant_court": qdrant_court,
-                    "sqlite_date": case["date"],
-                    "qdrant_date": qdrant_date,
-                    "file_name": case["file_name"],
-                    "title_match": title_match,
-                    "court_match": court_match,
-                    "date_match": date_match,
-                    "complete_match": title_match and court_match and date_match,
-                    "in_qdrant": True
-                })
-            else:
-                # Case not found in Qdrant
-                results.append({
-                    "case_id": case_id,
-                    "qdrant_point_id": None,
-                    "sqlite_title": case["title"],
-                    "qdrant_title": "",
-                    "sqlite_court": case["court"],
-                    "qdrant_court": "",
-                    "sqlite_date": case["date"],
-                    "qdrant_date": "",
-                    "file_name": case["file_name"],
-                    "title_match": False,
-                    "court_match": False,
-                    "date_match": False,
-                    "complete_match": False,
-                    "in_qdrant": False
-                })
-                
-        except Exception as e:
-            logger.error(f"Error querying Qdrant for case ID {case_id}: {e}")
-            # Record error
-            results.append({
-                "case_id": case_id,
-                "qdrant_point_id": None,
-                "sqlite_title": case["title"],
-                "qdrant_title": "",
-                "sqlite_court": case["court"],
-                "qdrant_court": "",
-                "sqlite_date": case["date"],
-                "qdrant_date": "",
-                "file_name": case["file_name"],
-                "title_match": False,
-                "court_match": False,
-                "date_match": False,
-                "complete_match": False,
-                "in_qdrant": False,
-                "error": str(e)
-            })
-    
-    return results
+    except Exception as e:
+        batch_error = str(e)
+        logger.error(f"Error querying Qdrant for batch of {len(case_batch)} cases: {e}")
+
+    # Columnar match computation: align the batch and the Qdrant payloads
+    # into object arrays and compare whole columns at once. Result dicts
+    # are only materialized for mismatches, so a clean batch allocates
+    # nothing per case.
+    points = [points_by_case_id.get(str(case["id"])) for case in case_batch]
+    payloads = [(point.payload or {}) if point is not None else {} for point in points]
+
+    in_qdrant = np.array([point is not None for point in points], dtype=bool)
+    sqlite_titles = np.array([case["title"] for case in case_batch], dtype=object)
+    sqlite_courts = np.array([case["court"] for case in case_batch], dtype=object)
+    sqlite_dates = [case["date"] for case in case_batch]
+    qdrant_titles = np.array([payload.get("title", "") for payload in payloads], dtype=object)
+    qdrant_courts = np.array([payload.get("court", "") for payload in payloads], dtype=object)
+    qdrant_dates = [payload.get("date", "") for payload in payloads]
+
+    title_match = (sqlite_titles == qdrant_titles) & in_qdrant
+    court_match = (sqlite_courts == qdrant_courts) & in_qdrant
+
+    # Normalize dates for comparison (year only; missing dates match).
+    # str.partition keeps the whole value when there is no "-", matching
+    # the old split()[0] semantics, and runs in pandas' C string path.
+    sqlite_date_series = pd.Series(sqlite_dates, dtype=object).fillna("")
+    qdrant_date_series = pd.Series(qdrant_dates, dtype=object).fillna("")
+    sqlite_years = sqlite_date_series.str.partition("-")[0].to_numpy(dtype=object)
+    qdrant_years = qdrant_date_series.str.partition("-")[0].to_numpy(dtype=object)
+    both_dated = (sqlite_date_series != "").to_numpy() & (qdrant_date_series != "").to_numpy()
+    date_match = (~both_dated | (sqlite_years == qdrant_years)) & in_qdrant
+
+    # The residual per-batch work is these boolean ANDs over numpy
+    # arrays; the field comparisons above already run in C. A JIT layer
+    # (numba et al.) would add a heavyweight dependency to re-optimize
+    # string-object comparisons it cannot lower anyway.
+    complete_match = title_match & court_match & date_match
+
+    metrics = {
+        "processed": len(case_batch),
+        "mismatches": int((~complete_match).sum()),
+        "not_in_qdrant": int((~in_qdrant).sum()),
+        "title_mismatches": int((~title_match).sum()),
+        "court_mismatches": int((~court_match).sum()),
+        "date_mismatches": int((~date_match).sum()),
+    }
+
+    mismatches = []
+    for i in np.flatnonzero(~complete_match):
+        case = case_batch[i]
+        record = {
+            "case_id": case["id"],
+            "qdrant_point_id": points[i].id if in_qdrant[i] else None,
+            "sqlite_title": case["title"],
+            "qdrant_title": qdrant_titles[i],
+            "sqlite_court": case["court"],
+            "qdrant_court": qdrant_courts[i],
+            "sqlite_date": case["date"],
+            "qdrant_date": qdrant_dates[i],
+            "file_name": case["file_name"],
+            "title_match": bool(title_match[i]),
+            "court_match": bool(court_match[i]),
+            "date_match": bool(date_match[i]),
+            "complete_match": False,
+            "in_qdrant": bool(in_qdrant[i])
+        }
+        if batch_error and not in_qdrant[i]:
+            record["error"] = batch_error
+        mismatches.append(record)
+
+    return metrics, mismatches
 
 def process_parquet_file(file_path, case_ids):
     """
@@ -267,33 +350,67 @@ def process_parquet_file(file_path, case_ids):
         return {}
         
     try:
-        # Read only the necessary columns for efficiency
-        df = pd.read_parquet(
-            file_path, 
-            columns=['id', 'name_abbreviation', 'court', 'decision_date']
-        )
-        
-        # Convert to strings to ensure matching works correctly
-        df['id'] = df['id'].astype(str)
-        
-        # Filter for only the IDs we're looking for
-        filtered_df = df[df['id'].isin([str(id) for id in case_ids])]
-        
-        # Convert to dictionary keyed by id
-        result = {}
-        for _, row in filtered_df.iterrows():
-            case_id = str(row['id'])
-            result[case_id] = {
-                'title': row.get('name_abbreviation', ''),
-                'court': row.get('court', ''),
-                'date': row.get('decision_date', '')
-            }
-            
-        return result
+        index = _load_parquet_index(file_path)
+        wanted_ids = {str(case_id) for case_id in case_ids}
+        return {case_id: index[case_id] for case_id in wanted_ids if case_id in index}
     except Exception as e:
         logger.error(f"Error reading parquet file {os.path.basename(file_path)}: {e}")
         return {}
 
+@functools.lru_cache(maxsize=32)
+def _load_parquet_index(file_path):
+    """Read a parquet file once and index id -> metadata.
+
+    Mismatches cluster by dataset file, so the same file serves many
+    consecutive batches; the LRU keeps recently used indexes warm
+    instead of re-reading and re-filtering the file per batch.
+    """
+    # pre_buffer coalesces the column-chunk byte ranges into large
+    # sequential reads submitted through pyarrow's async I/O layer —
+    # the portable version of batched-syscall reads on NVMe.
+    parquet_format = ds.ParquetFileFormat(
+        default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+    )
+    table = ds.dataset(file_path, format=parquet_format).to_table(
+        columns=['id', 'name_abbreviation', 'court', 'decision_date']
+    )
+
+    # Build the index dict from columnar lists (no iterrows). Only cast
+    # the id column when it is not already a string type — the cast is a
+    # full-column allocation on every load otherwise.
+    id_column = table.column('id')
+    if not (pa.types.is_string(id_column.type) or pa.types.is_large_string(id_column.type)):
+        id_column = pc.cast(id_column, pa.string())
+    ids = id_column.to_pylist()
+    titles = table.column('name_abbreviation').to_pylist()
+    courts = table.column('court').to_pylist()
+    dates = table.column('decision_date').to_pylist()
+
+    return {
+        case_id: {
+            'title': title or '',
+            'court': court or '',
+            'date': date or ''
+        }
+        for case_id, title, court, date in zip(ids, titles, courts, dates)
+    }
+
+# One decode pool for the whole run: per-batch pool construction and
+# teardown costs thread spawns every batch for no benefit. Threads, not
+# processes — pyarrow decodes with the GIL released, and a process pool
+# would re-read files the LRU index cache already holds.
+_parquet_executor = None
+
+def _get_parquet_executor():
+    """Get or create the shared parquet-load thread pool."""
+    global _parquet_executor
+    if _parquet_executor is None:
+        _parquet_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, os.cpu_count() or 4),
+            thread_name_prefix="parquet-load",
+        )
+    return _parquet_executor
+
 def check_parquet_files_for_mismatches(mismatches_batch):
     """
     Check parquet files for cases with mismatches.
@@ -304,19 +421,28 @@ def check_parquet_files_for_mismatches(mismatches_batch):
     Returns:
         Updated list with parquet data added
     """
-    # Group mismatches by parquet file
-    files_to_check = defaultdict(list)
-    for case in mismatches_batch:
-        file_name = case.get("file_name")
-        if file_name:
-            files_to_check[file_name].append(case["case_id"])
-    
-    # Check each parquet file
+    # Group mismatches by parquet file in pandas' C path; only the two
+    # columns needed for grouping are materialized
+    grouping_df = pd.DataFrame({
+        "file_name": [case.get("file_name") for case in mismatches_batch],
+        "case_id": [case["case_id"] for case in mismatches_batch],
+    })
+    grouping_df = grouping_df[grouping_df["file_name"].notna() & (grouping_df["file_name"] != "")]
+    files_to_check = grouping_df.groupby("file_name")["case_id"].unique()
+    
+    # Load every needed parquet file concurrently; pyarrow releases the
+    # GIL during I/O and decode, so threads overlap real work (and the
+    # whole step already runs off the event loop via run_in_executor).
     parquet_results = {}
-    for file_name, case_ids in files_to_check.items():
-        file_path = os.path.join(PARQUET_BASE_DIR, file_name)
-        parquet_data = process_parquet_file(file_path, case_ids)
-        parquet_results.update(parquet_data)
+    executor = _get_parquet_executor()
+    futures = [
+        executor.submit(
+            process_parquet_file, os.path.join(PARQUET_BASE_DIR, file_name), case_ids
+        )
+        for file_name, case_ids in files_to_check.items()
+    ]
+    for future in concurrent.futures.as_completed(futures):
+        parquet_results.update(future.result())
     
     # Update mismatches with parquet data
     results = []
@@ -353,28 +479,21 @@ def check_parquet_files_for_mismatches(mismatches_batch):
     
     return results
 
-def process_cases(case_batch):
+async def process_cases(case_batch):
     """Process a batch of cases to identify mismatches."""
-    # Step 1: Check Qdrant data
-    checked_cases = check_qdrant_for_case_batch(case_batch)
-    
-    # Step 2: Find mismatches
-    mismatches = [case for case in checked_cases if not case["complete_match"]]
-    
-    # Step 3: For mismatches, check parquet files
+    # Step 1: Check Qdrant data; metrics come back precomputed from the
+    # columnar match masks
+    metrics, mismatches = await check_qdrant_for_case_batch(case_batch)
+
+    # Step 2: For mismatches, check parquet files. Parquet decode is
+    # CPU/disk work, so it runs on the default executor rather than
+    # blocking the event loop.
     if mismatches:
-        mismatches = check_parquet_files_for_mismatches(mismatches)
-    
-    # Return metrics and mismatches
-    metrics = {
-        "processed": len(checked_cases),
-        "mismatches": len(mismatches),
-        "not_in_qdrant": sum(1 for case in checked_cases if not case["in_qdrant"]),
-        "title_mismatches": sum(1 for case in checked_cases if not case["title_match"]),
-        "court_mismatches": sum(1 for case in checked_cases if not case["court_match"]),
-        "date_mismatches": sum(1 for case in checked_cases if not case["date_match"])
-    }
-    
+        loop = asyncio.get_running_loop()
+        mismatches = await loop.run_in_executor(
+            None, check_parquet_files_for_mismatches, mismatches
+        )
+
     return metrics, mismatches
 
 def run_reconciliation(batch_size=BATCH_SIZE, limit=None, apply_fixes=False):
@@ -392,37 +511,43 @@ def run_reconciliation(batch_size=BATCH_SIZE, limit=None, apply_fixes=False):
         "date_mismatches": 0
     }
     
-    all_mismatches = []
     batch_num = 0
-    
-    # Process in batches
-    with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+
+    # Mismatches stream straight to JSONL as each batch completes —
+    # constant memory and linear write volume, versus accumulating the
+    # full list and rewriting the entire report every 10 batches.
+    mismatch_file = open(MISMATCHES_FILE, 'w')
+
+    # Process in batches. The old ProcessPoolExecutor was never actually
+    # submitted to; the work is network fanout, which the async Qdrant
+    # path handles with concurrent scrolls inside each batch.
+    async def process_all_batches():
+        nonlocal batch_num
         for batch in get_sqlite_case_batches(batch_size, limit):
             batch_num += 1
             batch_start = time.time()
-            
+
             # Process batch
-            metrics, mismatches = process_cases(batch)
-            
+            metrics, mismatches = await process_cases(batch)
+
             # Update totals
             for key in total_metrics:
                 total_metrics[key] += metrics[key]
-            
-            all_mismatches.extend(mismatches)
-            
+
+            if mismatches:
+                mismatch_file.write(
+                    '\n'.join(json.dumps(m, separators=(",", ":")) for m in mismatches) + '\n'
+                )
+                mismatch_file.flush()
+
             # Log progress
             batch_time = time.time() - batch_start
             logger.info(f"Batch {batch_num}: Processed {metrics['processed']} cases in {batch_time:.2f}s, found {metrics['mismatches']} mismatches")
-            
-            # Periodically save mismatches
-            if batch_num % 10 == 0:
-                with open(MISMATCHES_FILE, 'w') as f:
-                    json.dump(all_mismatches, f, indent=2)
-                logger.info(f"Saved {len(all_mismatches)} mismatches to {MISMATCHES_FILE}")
-    
-    # Save final results
-    with open(MISMATCHES_FILE, 'w') as f:
-        json.dump(all_mismatches, f, indent=2)
+
+    try:
+        asyncio.run(process_all_batches())
+    finally:
+        mismatch_file.close()
     
     # Create summary
     summary = {
@@ -430,27 +555,42 @@ def run_reconciliation(batch_size=BATCH_SIZE, limit=None, apply_fixes=False):
         "total_mismatches": total_metrics["mismatches"],
         "mismatch_percentage": (total_metrics["mismatches"] / total_metrics["processed"]) * 100 if total_metrics["processed"] > 0 else 0,
         "metrics": total_metrics,
-        "mismatch_types": analyze_mismatches(all_mismatches),
+        "mismatch_types": analyze_mismatches(iter_mismatches()),
         "total_time_seconds": time.time() - start_time
     }
-    
+
     with open(SUMMARY_FILE, 'w') as f:
         json.dump(summary, f, indent=2)
-    
+
     logger.info(f"Reconciliation complete in {summary['total_time_seconds']:.2f} seconds")
     logger.info(f"Processed {summary['total_cases']} cases, found {summary['total_mismatches']} mismatches ({summary['mismatch_percentage']:.2f}%)")
-    
+
     # Generate fix script
-    generate_fix_script(all_mismatches)
-    
-    if apply_fixes and all_mismatches:
+    generate_fix_script(iter_mismatches())
+
+    if apply_fixes and total_metrics["mismatches"]:
         logger.info("Applying fixes...")
-        apply_data_fixes(all_mismatches)
-    
-    return summary, all_mismatches
+        apply_data_fixes(iter_mismatches())
+
+    return summary
+
+def iter_mismatches():
+    """Stream mismatch records back from the JSONL report."""
+    if not os.path.exists(MISMATCHES_FILE):
+        return
+    with open(MISMATCHES_FILE) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
 
 def analyze_mismatches(mismatches):
-    """Analyze patterns in mismatches."""
+    """Analyze patterns in mismatches.
+
+    Works on any iterable in a single pass with O(distinct categories)
+    memory, so it can consume the streamed JSONL reader directly — the
+    full mismatch set is never materialized.
+    """
     analysis = {
         "by_court": defaultdict(int),
         "by_jurisdiction": defaultdict(int),
@@ -510,18 +650,18 @@ def analyze_mismatches(mismatches):
     return analysis
 
 def generate_fix_script(mismatches):
-    """Generate a Python script to fix inconsistencies."""
-    if not mismatches:
-        logger.info("No mismatches found, no fix script needed")
-        return
-    
+    """Generate a Python script to fix inconsistencies.
+
+    `mismatches` may be any iterable, including the streamed JSONL
+    reader; it is consumed exactly once.
+    """
     # Group fixes by type
     fixes_by_type = {
         "update_qdrant": [],
         "update_sqlite": [],
         "requires_manual_review": []
     }
-    
+
     for case in mismatches:
         source = case.get("source_of_truth", "indeterminate")
         
@@ -537,7 +677,36 @@ def generate_fix_script(mismatches):
                 fixes_by_type["update_qdrant"].append(case)
         else:
             fixes_by_type["requires_manual_review"].append(case)
-    
+
+    if not any(fixes_by_type.values()):
+        logger.info("No mismatches found, no fix script needed")
+        return
+
+    # Write the fix data as JSON sidecars (all cases, no truncation);
+    # the generated script loads these at runtime instead of carrying
+    # hand-escaped literals in its source
+    with open(SQLITE_FIXES_FILE, 'w') as f:
+        json.dump([
+            {
+                "id": case["case_id"],
+                "title": case["qdrant_title"] or case["parquet_title"],
+                "court": case["qdrant_court"] or case["parquet_court"],
+                "date": case["qdrant_date"] or case["parquet_date"],
+            }
+            for case in fixes_by_type["update_sqlite"]
+        ], f)
+
+    with open(QDRANT_FIXES_FILE, 'w') as f:
+        json.dump([
+            {
+                "id": case["case_id"],
+                "title": case["sqlite_title"] or case["parquet_title"],
+                "court": case["sqlite_court"] or case["parquet_court"],
+                "date": case["sqlite_date"] or case["parquet_date"],
+            }
+            for case in fixes_by_type["update_qdrant"]
+        ], f)
+
     # Generate script
     with open(FIX_SCRIPT_FILE, 'w') as f:
         f.write("""#!/usr/bin/env python
@@ -557,6 +726,7 @@ Options:
 
 import os
 import sys
+import json
 import sqlite3
 import logging
 import argparse
@@ -581,33 +751,36 @@ logger = logging.getLogger(__name__)
 SQLITE_DB_PATH = os.path.join(os.getcwd(), "case_lookup.db")
 QDRANT_COLLECTION = "caselaw_bge_base_v2"
 
-def update_sqlite_case(case_id, title, court, date, dry_run=False):
-    \"\"\"Update case metadata in SQLite.\"\"\"
+def apply_sqlite_fixes(fixes, dry_run=False):
+    \"\"\"Apply all SQLite updates in one transaction via executemany.
+
+    One connection, one commit: per-row connect/commit costs an fsync
+    per case, which is what dominates bulk fix application.
+    \"\"\"
     if dry_run:
-        logger.info(f"DRY RUN: Would update SQLite case {case_id} to title='{title}', court='{court}', date='{date}'")
-        return True
-        
+        for fix in fixes:
+            logger.info(f"DRY RUN: Would update SQLite case {fix['id']} to title='{fix['title']}', court='{fix['court']}', date='{fix['date']}'")
+        return len(fixes), 0
+
+    if not fixes:
+        return 0, 0
+
     try:
         conn = sqlite3.connect(SQLITE_DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         cursor = conn.cursor()
-        
-        cursor.execute(
+        cursor.executemany(
             "UPDATE cases SET name_abbreviation = ?, court = ?, decision_date = ? WHERE id = ?",
-            (title, court, date, case_id)
+            [(fix["title"], fix["court"], fix["date"], fix["id"]) for fix in fixes]
         )
-        
-        if cursor.rowcount == 0:
-            logger.warning(f"No SQLite case found with ID {case_id}")
-            conn.close()
-            return False
-            
         conn.commit()
         conn.close()
-        logger.info(f"Updated SQLite case {case_id}")
-        return True
+        logger.info(f"Updated {len(fixes)} SQLite cases in one transaction")
+        return len(fixes), 0
     except Exception as e:
-        logger.error(f"Error updating SQLite case {case_id}: {e}")
-        return False
+        logger.error(f"Error applying SQLite fixes: {e}")
+        return 0, len(fixes)
 
 def update_qdrant_case(case_id, title, court, date, dry_run=False):
     \"\"\"Update case metadata in Qdrant.\"\"\"
@@ -659,55 +832,27 @@ def main():
     fixed_sqlite = 0
     fixed_qdrant = 0
     errors = 0
-    
-    # 1. Update SQLite from Qdrant or Parquet
-    sqlite_fixes = [
-""")
-        
-        # Add SQLite fixes
-        for i, case in enumerate(fixes_by_type["update_sqlite"][:100]):  # Limit to first 100 in script
-            f.write(f'        {{\"id\": \"{case["case_id"]}\", \"title\": \"{case["qdrant_title"] or case["parquet_title"]}\", \"court\": \"{case["qdrant_court"] or case["parquet_court"]}\", \"date\": \"{case["qdrant_date"] or case["parquet_date"]}\"}},\n')
-        
-        if len(fixes_by_type["update_sqlite"]) > 100:
-            f.write(f'        # ... plus {len(fixes_by_type["update_sqlite"]) - 100} more cases\n')
-        
-        # Add Qdrant fixes
-        f.write("""    ]
-    
-    # 2. Update Qdrant from SQLite or Parquet
-    qdrant_fixes = [
-""")
-        
-        for i, case in enumerate(fixes_by_type["update_qdrant"][:100]):  # Limit to first 100 in script
-            f.write(f'        {{\"id\": \"{case["case_id"]}\", \"title\": \"{case["sqlite_title"] or case["parquet_title"]}\", \"court\": \"{case["sqlite_court"] or case["parquet_court"]}\", \"date\": \"{case["sqlite_date"] or case["parquet_date"]}\"}},\n')
-        
-        if len(fixes_by_type["update_qdrant"]) > 100:
-            f.write(f'        # ... plus {len(fixes_by_type["update_qdrant"]) - 100} more cases\n')
-        
-        # Complete the script
-        f.write("""    ]
-    
+
+    # Fix data lives in JSON sidecars written by the reconciliation run;
+    # loading it at runtime keeps this script small and avoids escaping
+    # issues with quotes or newlines in case titles.
+    with open("fix_sqlite.json") as fh:
+        sqlite_fixes = json.load(fh)
+    with open("fix_qdrant.json") as fh:
+        qdrant_fixes = json.load(fh)
+
     # Apply fixes with limit if specified
     if args.limit:
         sqlite_fixes = sqlite_fixes[:args.limit]
         remaining = args.limit - len(sqlite_fixes)
         qdrant_fixes = qdrant_fixes[:max(0, remaining)]
     
-    # Process SQLite fixes
+    # Process SQLite fixes as one batched transaction
     logger.info(f"Applying {len(sqlite_fixes)} SQLite updates")
-    for fix in sqlite_fixes:
-        success = update_sqlite_case(
-            fix["id"], 
-            fix["title"], 
-            fix["court"], 
-            fix["date"],
-            dry_run=args.dry_run
-        )
-        if success:
-            fixed_sqlite += 1
-        else:
-            errors += 1
-    
+    applied, failed = apply_sqlite_fixes(sqlite_fixes, dry_run=args.dry_run)
+    fixed_sqlite += applied
+    errors += failed
+
     # Process Qdrant fixes
     logger.info(f"Applying {len(qdrant_fixes)} Qdrant updates")
     for fix in qdrant_fixes:
@@ -737,7 +882,7 @@ if __name__ == "__main__":
     main()
 """)
     
-    logger.info(f"Generated fix script: {FIX_SCRIPT_FILE}")
+    logger.info(f"Generated fix script: {FIX_SCRIPT_FILE} (data in {SQLITE_FIXES_FILE}, {QDRANT_FIXES_FILE})")
     logger.info(f"- {len(fixes_by_type['update_sqlite'])} cases need SQLite updates")
     logger.info(f"- {len(fixes_by_type['update_qdrant'])} cases need Qdrant updates")
     logger.info(f"- {len(fixes_by_type['requires_manual_review'])} cases need manual review")
@@ -4,6 +4,13 @@ import re
 from fastapi.testclient import TestClient
 from app.main import app
 
+# orjson serializes the (potentially large) result dump much faster
+# than the stdlib; fall back to json when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 client = TestClient(app)
 
 # Test cases with different IDs to evaluate syllabus formatting
@@ -14,31 +21,41 @@ TEST_CASE_IDS = [
     "4363109"   # United States v. One Palmetto State Armory (gun laws case)
 ]
 
+# The key sections we want to extract and format
+SECTIONS = [
+    "Key Legal Issue",
+    "Holding",
+    "Reasoning"
+]
+
+# One compiled pattern matching any section header: finditer extracts
+# all sections in a single pass instead of one full scan per section
+_SECTION_RE = re.compile(
+    fr"\*\*({'|'.join(SECTIONS)}):\*\*\s*(.*?)(?=\*\*\w|\Z)", re.DOTALL
+)
+
+# Matches the final sentence terminator: one backwards-anchored scan
+# instead of three rfind passes over the section content
+_LAST_SENT_RE = re.compile(r"[.!?][^.!?]*\Z", re.DOTALL)
+
 def format_syllabus(raw_syllabus):
     """
     Reformat a raw syllabus into a more structured, readable format
     """
-    # Define the key sections we want to extract and format
-    sections = [
-        "Key Legal Issue",
-        "Holding",
-        "Reasoning"
-    ]
-    
+    # Single scan of the syllabus; emit in canonical section order below
+    extracted = {m.group(1): m.group(2) for m in _SECTION_RE.finditer(raw_syllabus)}
+
     formatted_parts = []
-    
-    # Extract each section if present
-    for section in sections:
-        pattern = fr"\*\*{section}:\*\*\s*(.*?)(?=\*\*\w|\Z)"
-        match = re.search(pattern, raw_syllabus, re.DOTALL)
-        if match:
-            section_content = match.group(1).strip()
+
+    for section in SECTIONS:
+        if section in extracted:
+            section_content = extracted[section].strip()
             # Ensure content doesn't end mid-sentence
-            if section_content and not any(section_content.endswith(p) for p in ['.', '!', '?', ':', ';']):
-                # Find the last complete sentence
-                last_period = max(section_content.rfind('.'), section_content.rfind('!'), section_content.rfind('?'))
-                if last_period > 0:
-                    section_content = section_content[:last_period+1]
+            if section_content and not section_content.endswith(('.', '!', '?', ':', ';')):
+                # Truncate after the last complete sentence
+                match = _LAST_SENT_RE.search(section_content)
+                if match and match.start() > 0:
+                    section_content = section_content[:match.start() + 1]
             
             # Format as a paragraph with a bold heading
             formatted_parts.append(f"**{section}:** {section_content}")
@@ -101,8 +118,12 @@ def test_case_syllabus_formatting():
             print(f"Error testing case {case_id}: {str(e)}")
     
     # Write results to a file for analysis
-    with open("syllabus_formatting_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    if orjson is not None:
+        with open("syllabus_formatting_results.json", "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        with open("syllabus_formatting_results.json", "w") as f:
+            json.dump(results, f, indent=2)
     
     print(f"\nDetailed results written to syllabus_formatting_results.json")
 
@@ -2,17 +2,35 @@
 # test_prefetch_fallback.py - Test the combined prefetch and fallback strategy
 # Run from the backend directory (no external dependencies)
 
+import asyncio
+import httpx
 import requests
 import re
 import time
 import json
 import sys
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+
+# orjson serializes large result lists several times faster than the
+# stdlib; fall back to json when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"  # Change to your API server
 TIMEOUT = 30  # Request timeout in seconds
 MAX_CONCURRENT = 5  # Max concurrent requests for prefetching
+PREFETCH_STREAM_FILE = "prefetch_stream.ndjson"  # Full results streamed here as they complete
+
+# One pooled session for the whole run: keep-alive connections avoid
+# paying TCP+TLS setup on every fetch
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=MAX_CONCURRENT, pool_maxsize=MAX_CONCURRENT)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
 
 def search_cases(query="battery tort", limit=10):
     """Perform a search to get case IDs for testing"""
@@ -20,7 +38,7 @@ def search_cases(query="battery tort", limit=10):
     
     url = f"{API_BASE_URL}/api/v1/search?q={query}&limit={limit}"
     try:
-        response = requests.get(url, timeout=TIMEOUT)
+        response = session.get(url, timeout=TIMEOUT)
         if response.ok:
             data = response.json()
             results = data.get("results", [])
@@ -33,18 +51,35 @@ def search_cases(query="battery tort", limit=10):
         print(f"Error during search: {e}")
         return []
 
-def fetch_case_details(case_id):
+# LRU over fetched case details: repeated searches re-hit the same
+# popular cases, and duplicates within or between batches should not
+# cost a second round-trip
+_CASE_CACHE_MAX = 1024
+_case_cache = OrderedDict()
+
+def _cache_result(case_id, result):
+    """Remember a successful fetch, evicting the least recently used"""
+    _case_cache[case_id] = result
+    _case_cache.move_to_end(case_id)
+    if len(_case_cache) > _CASE_CACHE_MAX:
+        _case_cache.popitem(last=False)
+
+async def fetch_case_details(client, case_id):
     """Fetch detailed case information including content"""
-    url = f"{API_BASE_URL}/api/v1/case/{case_id}/full"
+    cached = _case_cache.get(case_id)
+    if cached is not None:
+        _case_cache.move_to_end(case_id)
+        return cached
+
     start_time = time.time()
-    
+
     try:
-        response = requests.get(url, timeout=TIMEOUT)
+        response = await client.get(f"/api/v1/case/{case_id}/full")
         elapsed = time.time() - start_time
-        
-        if response.ok:
+
+        if response.status_code < 400:
             data = response.json()
-            return {
+            result = {
                 "case_id": case_id,
                 "elapsed": elapsed,
                 "success": True,
@@ -54,13 +89,15 @@ def fetch_case_details(case_id):
                 "key_passages": data.get("keyPassages", []),
                 "has_ai_passages": len(data.get("keyPassages", [])) > 0
             }
+            _cache_result(case_id, result)
+            return result
         else:
-            print(f"Error fetching case {case_id}: {response.status_code} - {response.reason}")
+            print(f"Error fetching case {case_id}: {response.status_code} - {response.reason_phrase}")
             return {
                 "case_id": case_id,
                 "elapsed": elapsed,
                 "success": False,
-                "error": f"{response.status_code} - {response.reason}"
+                "error": f"{response.status_code} - {response.reason_phrase}"
             }
     except Exception as e:
         elapsed = time.time() - start_time
@@ -72,68 +109,205 @@ def fetch_case_details(case_id):
             "error": str(e)
         }
 
+def prefetch_case_details_batch(case_ids):
+    """Fetch all cases in one round-trip via the server-side batch endpoint.
+
+    Returns None when the endpoint is unavailable so callers can fall
+    back to concurrent single fetches.
+    """
+    url = f"{API_BASE_URL}/api/v1/case/batch/full"
+    start_time = time.time()
+
+    try:
+        response = session.post(url, json={"case_ids": case_ids}, timeout=TIMEOUT * 2)
+    except Exception as e:
+        print(f"Batch endpoint unavailable ({e}), falling back to concurrent fetches")
+        return None
+
+    if not response.ok:
+        print(f"Batch endpoint returned {response.status_code}, falling back to concurrent fetches")
+        return None
+
+    elapsed = time.time() - start_time
+    results = []
+    for data in response.json().get("results", []):
+        if "error" in data:
+            results.append({
+                "case_id": data.get("case_id"),
+                "elapsed": elapsed,
+                "success": False,
+                "error": data["error"]
+            })
+            continue
+        results.append({
+            "case_id": data.get("case_id"),
+            "elapsed": elapsed,
+            "success": True,
+            "title": data.get("title", "Unknown Case"),
+            "summary": data.get("summary", ""),
+            "content": data.get("content", ""),
+            "key_passages": data.get("keyPassages", []),
+            "has_ai_passages": len(data.get("keyPassages", [])) > 0
+        })
+    return results
+
 def prefetch_case_details(case_ids, max_workers=MAX_CONCURRENT):
     """Prefetch multiple cases concurrently (simulating frontend prefetching)"""
+    # Search results can repeat cases; fetch each distinct ID once
+    case_ids = list(dict.fromkeys(case_ids))
     print(f"Prefetching {len(case_ids)} cases with {max_workers} workers...")
     start_time = time.time()
-    
-    results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_case = {executor.submit(fetch_case_details, case_id): case_id for case_id in case_ids}
-        for future in future_to_case:
-            try:
-                result = future.result()
-                results.append(result)
-                case_id = future_to_case[future]
-                status = "✓" if result.get("success", False) else "✗"
-                passages = len(result.get("key_passages", []))
-                print(f"{status} Case {case_id}: {result.get('elapsed', 0):.2f}s - {passages} passages")
-            except Exception as e:
-                print(f"Error in future: {e}")
-    
+
+    # Prefer the batch endpoint: one round-trip instead of N
+    batch_results = prefetch_case_details_batch(case_ids)
+    if batch_results is not None:
+        total_time = time.time() - start_time
+        for result in batch_results:
+            status = "✓" if result.get("success", False) else "✗"
+            passages = len(result.get("key_passages", []))
+            print(f"{status} Case {result.get('case_id')}: {passages} passages")
+        print(f"Total prefetch time (batch): {total_time:.2f}s")
+        return batch_results, total_time
+
+    # Concurrent fallback: one HTTP/2 connection multiplexes all fetches
+    # instead of thread-per-request with a TCP connection each. Results
+    # are consumed in completion order and each full body is streamed
+    # straight to disk; only a compact summary per case stays in memory.
+    async def fetch_all():
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def bounded_fetch(client, case_id):
+            async with semaphore:
+                return await fetch_case_details(client, case_id)
+
+        results = []
+        limits = httpx.Limits(max_connections=max_workers)
+        async with httpx.AsyncClient(base_url=API_BASE_URL, http2=True,
+                                     limits=limits, timeout=TIMEOUT) as client:
+            with open(PREFETCH_STREAM_FILE, 'wb') as stream:
+                pending = [bounded_fetch(client, case_id) for case_id in case_ids]
+                for coro in asyncio.as_completed(pending):
+                    result = await coro
+                    _write_ndjson_line(stream, result)
+                    compact = {k: v for k, v in result.items() if k != "content"}
+                    compact["content_len"] = len(result.get("content", ""))
+                    results.append(compact)
+                    status = "✓" if result.get("success", False) else "✗"
+                    passages = len(result.get("key_passages", []))
+                    print(f"{status} Case {result.get('case_id')}: {result.get('elapsed', 0):.2f}s - {passages} passages")
+        return results
+
+    results = asyncio.run(fetch_all())
+
     total_time = time.time() - start_time
     print(f"Total prefetch time: {total_time:.2f}s")
     return results, total_time
 
+def _write_ndjson_line(f, obj):
+    """Append one compact JSON line to a binary stream file"""
+    if orjson is not None:
+        f.write(orjson.dumps(obj))
+    else:
+        f.write(json.dumps(obj, separators=(',', ':')).encode())
+    f.write(b"\n")
+
+def _load_streamed_content(case_id):
+    """Reload one case's full content from the prefetch stream file"""
+    try:
+        with open(PREFETCH_STREAM_FILE) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("case_id") == case_id:
+                    return record.get("content", "")
+    except OSError:
+        pass
+    return ""
+
+# Compiled once at import: extract_fallback_passage runs per case and
+# would otherwise recompile these patterns on every call
+_WS_RE = re.compile(r'\s+')
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Key legal terms used to score candidate sentences
+_LEGAL_KEYWORDS = frozenset([
+    'therefore', 'court', 'held', 'rule', 'find', 'judge',
+    'plaintiff', 'defendant', 'affirmed', 'reversed',
+    'conclude', 'judgment', 'opinion', 'statute'
+])
+
+# Optional Aho-Corasick automaton: finds every keyword hit in one pass
+# over the sentence instead of one substring scan per keyword. Falls
+# back to plain substring checks when pyahocorasick is not installed.
+try:
+    import ahocorasick
+
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _kw in _LEGAL_KEYWORDS:
+        _KEYWORD_AUTOMATON.add_word(_kw, _kw)
+    _KEYWORD_AUTOMATON.make_automaton()
+except ImportError:
+    _KEYWORD_AUTOMATON = None
+
+# Fallback matcher: one alternation pattern means a single C-level pass
+# per sentence instead of one substring scan per keyword. Longer
+# keywords first so alternation prefers the longest match.
+_KEYWORD_RE = re.compile(
+    '|'.join(map(re.escape, sorted(_LEGAL_KEYWORDS, key=len, reverse=True)))
+)
+
+def _count_keyword_hits(sentence_lower):
+    """Count distinct legal keywords present in a lowercased sentence.
+
+    Deduped so a sentence repeating one keyword does not outscore one
+    containing several different keywords — the same binary-presence
+    scoring as checking each keyword with a substring test.
+    """
+    if _KEYWORD_AUTOMATON is not None:
+        return len({kw for _, kw in _KEYWORD_AUTOMATON.iter(sentence_lower)})
+    return len(set(_KEYWORD_RE.findall(sentence_lower)))
+
 def extract_fallback_passage(text, min_length=75, max_length=500):
     """Extract a fallback key passage from text when AI doesn't provide one"""
     if not text or len(text) < min_length:
         return None
-        
-    # Try to find sentences with key legal terms
-    legal_keywords = ['therefore', 'court', 'held', 'rule', 'find', 'judge', 
-                     'plaintiff', 'defendant', 'affirmed', 'reversed', 
-                     'conclude', 'judgment', 'opinion', 'statute']
-    
+
     # Clean and normalize text
-    text = re.sub(r'\s+', ' ', text)
-    
+    text = _WS_RE.sub(' ', text)
+
     # Extract sentences
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    
-    # Score sentences by length and keyword presence
-    scored_sentences = []
+    sentences = _SENT_RE.split(text)
+
+    # Score sentences by length and keyword presence, tracking the best
+    # one inline: only the maximum is needed, so building and sorting a
+    # full scored list would be wasted work on long opinions
+    best_sentence = None
+    best_score = -1
     for sentence in sentences:
         sentence = sentence.strip()
         if min_length <= len(sentence) <= max_length:
-            # Calculate keyword score
-            keyword_count = sum(1 for kw in legal_keywords if kw.lower() in sentence.lower())
-            
+            # Lowercase once per sentence, not once per keyword
+            sentence_lower = sentence.lower()
+            keyword_count = _count_keyword_hits(sentence_lower)
+
             # Bonus for sentences with quotation marks
             quote_bonus = 5 if '"' in sentence or "'" in sentence else 0
-            
+
             # Length score - prefer medium length sentences
             length_score = min(10, len(sentence) / 50)
-            
+
             # Total score
             total_score = keyword_count * 2 + quote_bonus + length_score
-            
-            scored_sentences.append((sentence, total_score))
-    
-    # If we found sentences, return the highest scoring one
-    if scored_sentences:
-        scored_sentences.sort(key=lambda x: x[1], reverse=True)
-        return scored_sentences[0][0]
+
+            if total_score > best_score:
+                best_sentence = sentence
+                best_score = total_score
+                # Good enough: stop scanning the rest of the document
+                if best_score >= 15:
+                    break
+
+    # If we found a suitable sentence, return the highest scoring one
+    if best_sentence is not None:
+        return best_sentence
         
     # If no good sentence found, just take the first reasonable chunk
     if text and len(text) >= min_length:
@@ -154,15 +328,19 @@ def analyze_and_apply_fallbacks(prefetch_results):
     # Apply fallbacks for cases without passages
     fallback_results = []
     for case in cases_without_passages:
-        # Try to extract from summary first, then from content
+        # Try to extract from summary first, then from content; streamed
+        # results dropped their content in-memory, so reload it on demand
+        has_content = bool(case.get("content")) or bool(case.get("content_len"))
         source_text = case.get("summary", "") or case.get("content", "")
+        if not source_text and case.get("content_len"):
+            source_text = _load_streamed_content(case.get("case_id"))
         fallback_passage = extract_fallback_passage(source_text)
-        
+
         fallback_results.append({
             "case_id": case.get("case_id"),
             "title": case.get("title"),
             "has_summary": bool(case.get("summary")),
-            "has_content": bool(case.get("content")),
+            "has_content": has_content,
             "fallback_passage": fallback_passage,
             "fallback_length": len(fallback_passage) if fallback_passage else 0,
             "source_length": len(source_text)
@@ -206,15 +384,26 @@ def main():
     # Analyze results and apply fallbacks where needed
     fallback_results = analyze_and_apply_fallbacks(prefetch_results)
     
-    # Save detailed results to file
+    # Save detailed results to file. Bound the embedded case content to
+    # a preview first: serializing entire opinions costs O(total text)
+    # and nothing downstream reads them from this file.
+    slim_results = [
+        {**r, "content": r.get("content", "")[:500]} for r in prefetch_results
+    ]
+    payload = {
+        "prefetch_results": slim_results,
+        "fallback_results": fallback_results,
+        "prefetch_time": prefetch_time,
+        "timestamp": time.time()
+    }
+
     output_file = "prefetch_fallback_results.json"
-    with open(output_file, 'w') as f:
-        json.dump({
-            "prefetch_results": prefetch_results,
-            "fallback_results": fallback_results,
-            "prefetch_time": prefetch_time,
-            "timestamp": time.time()
-        }, f, indent=2)
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(payload, f, indent=2)
     
     print(f"\nDetailed results saved to {output_file}")
     
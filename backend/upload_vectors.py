@@ -5,17 +5,46 @@ Multi-threaded script to upload vector embeddings from pickle files to Qdrant.
 Optimized for M4 Max with 16 cores and 128GB RAM, with improved error handling.
 """
 
+import asyncio
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
 import pickle
+import queue
+import threading
 import time
 import logging
+import numpy as np
 from pathlib import Path
-import concurrent.futures
 from tqdm import tqdm
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models
 import backoff
 
+# zstd-compressed batch pickles (.pkl.zst) cut disk and read time by
+# roughly 3x; plain .pkl files still load when zstandard is missing
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# orjson parses the shard payload sidecars several times faster than the
+# stdlib; fall back to json when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pybloom_live enables id-granular resume: a Bloom filter of uploaded
+# point ids lets a restarted run skip points inside partially uploaded
+# files (and shards). Without it resume stays file-grained.
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -29,16 +58,73 @@ COLLECTION_NAME = "caselaw_bge_base_v2"
 BATCH_SIZE = 1000  # Reduced batch size
 QDRANT_HOST = "localhost"
 QDRANT_PORT = 6333
-QDRANT_TIMEOUT = 180.0  # 3-minute timeout
+QDRANT_GRPC_PORT = 6334
+QDRANT_TIMEOUT = 180.0
+INDEXING_THRESHOLD = 20000  # Normal serving threshold restored after the bulk load
+# Channel options shared by both clients, matching parallel_processor:
+# keep-alives hold the connection open across idle stretches (tuning
+# pauses, index flushes) and the stream/ping caps keep many concurrent
+# upserts flowing over the single shared channel.
+QDRANT_GRPC_OPTIONS = {
+    "grpc.keepalive_time_ms": 30000,
+    "grpc.keepalive_timeout_ms": 10000,
+    "grpc.http2.max_pings_without_data": 0,
+    "grpc.max_concurrent_streams": 128,
+    "grpc.max_send_message_length": 64 << 20,
+    "grpc.max_receive_message_length": 64 << 20,
+}
 VECTOR_SIZE = 768  # BGE base dimension
-NUM_WORKERS = 8  # Reduced to avoid overwhelming the server
+NUM_WORKERS = 8  # Max in-flight upserts across all worker directories
 MAX_FILES_PER_WORKER = None  # Set to a number for testing, None for all files
+UPLOAD_CONCURRENCY = 2  # In-flight upserts per worker (async semaphore)
+BATCH_SIZE_GRID = (64, 128, 256, 512, 1024)  # Candidate sizes for the auto-tuner
+OPTIMAL_BATCH = None  # Set per process by tune_batch_size
+SHARD_VECTORS_FILE = "shard.f32"  # Contiguous [N, 768] float32 matrix per worker dir
+SHARD_PAYLOADS_FILE = "shard_payloads.jsonl"  # One {"id", "payload"} line per row
+SHARD_CHUNK_ROWS = 8192  # Rows pulled off the memmap per producer step
+DECODE_THREADS = 3  # Pickle files decoded concurrently per worker directory
+DECODE_WINDOW = 4  # Decoded-but-unconsumed files kept in flight
+DONE_FILE = "uploaded_files.done"  # Per-directory log of fully uploaded pickle files
+BARRIER_EVERY_BATCHES = 50  # Send a wait=True upsert roughly this often per worker
+BLOOM_FILE = "uploaded_ids.bloom"  # Per-directory Bloom filter of uploaded point ids
+BLOOM_INITIAL_CAPACITY = 1_000_000  # Scalable filter grows beyond this on its own
+# Kept well below the usual 1%: a false positive means a point is
+# skipped on resume without ever having been uploaded
+BLOOM_ERROR_RATE = 0.001
+BLOOM_PERSIST_EVERY_WINDOWS = 10  # Gather windows between filter snapshots
+# Every payload key the API actually reads (search results, case detail
+# and CID lookups). The pipeline also emits volume/reporter/page_first,
+# which nothing consumes — dropping them shrinks every upsert request
+# and the server's payload storage.
+ALLOWED_PAYLOAD_KEYS = frozenset({
+    "title", "date", "court", "jurisdiction", "snippet",
+    "case_id", "original_cid", "citation", "citations", "judges",
+})
 
 def get_qdrant_client():
-    """Create a Qdrant client with appropriate timeout settings."""
+    """Create a Qdrant client with appropriate timeout settings.
+
+    gRPC keeps vectors in protobuf instead of JSON-encoding 768 floats
+    per point, which roughly halves bytes on the wire and removes the
+    float-to-string conversion cost on this bandwidth-bound upload.
+    """
     return QdrantClient(
-        host=QDRANT_HOST, 
+        host=QDRANT_HOST,
+        port=QDRANT_PORT,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=True,
+        grpc_options=QDRANT_GRPC_OPTIONS,
+        timeout=QDRANT_TIMEOUT
+    )
+
+def get_async_qdrant_client():
+    """Create an async Qdrant client for concurrent upserts."""
+    return AsyncQdrantClient(
+        host=QDRANT_HOST,
         port=QDRANT_PORT,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=True,
+        grpc_options=QDRANT_GRPC_OPTIONS,
         timeout=QDRANT_TIMEOUT
     )
 
@@ -55,6 +141,17 @@ def ensure_collection_exists(client):
                 vectors_config=models.VectorParams(
                     size=VECTOR_SIZE,
                     distance=models.Distance.COSINE
+                ),
+                # Scalar int8 quantization cuts the server's vector RAM
+                # 4x; the server derives the quantization bounds itself,
+                # so the wire format stays float32 and no client-side
+                # scale bookkeeping is needed
+                quantization_config=models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True
+                    )
                 )
             )
             logger.info(f"Collection {COLLECTION_NAME} created successfully")
@@ -64,6 +161,23 @@ def ensure_collection_exists(client):
         logger.error(f"Error ensuring collection exists: {e}")
         raise
 
+def set_indexing_threshold(client, threshold):
+    """Set the collection's optimizer indexing threshold.
+
+    Bulk loads go faster with indexing disabled (threshold 0): the
+    server just appends segments instead of rebuilding the HNSW graph
+    while upserts are still streaming in, and builds the index once
+    when the normal threshold is restored at the end.
+    """
+    try:
+        client.update_collection(
+            collection_name=COLLECTION_NAME,
+            optimizer_config=models.OptimizersConfigDiff(indexing_threshold=threshold)
+        )
+        logger.info(f"Set indexing_threshold={threshold} on {COLLECTION_NAME}")
+    except Exception as e:
+        logger.error(f"Error setting indexing_threshold={threshold}: {e}")
+
 def get_worker_dirs():
     """Get all worker directories from the embeddings directory."""
     base_dir = Path(EMBEDDINGS_DIR)
@@ -74,7 +188,9 @@ def get_worker_dirs():
 def get_pickle_files(worker_dir, limit=None):
     """Get all pickle files in a worker directory, optionally limited."""
     worker_path = Path(worker_dir)
-    pickle_files = sorted(list(worker_path.glob("batch_*.pkl")))
+    pickle_files = sorted(worker_path.glob("batch_*.pkl"))
+    if zstd is not None:
+        pickle_files = sorted(pickle_files + list(worker_path.glob("batch_*.pkl.zst")))
     
     if limit:
         pickle_files = pickle_files[:limit]
@@ -82,88 +198,512 @@ def get_pickle_files(worker_dir, limit=None):
     logger.info(f"Found {len(pickle_files)} pickle files in {worker_dir}")
     return pickle_files
 
+def _fadvise(fileobj, advice_name):
+    """Best-effort kernel readahead hint; silently a no-op where
+    posix_fadvise is unavailable (macOS) or the fd rejects it."""
+    advice = getattr(os, advice_name, None)
+    if advice is None:
+        return
+    try:
+        os.posix_fadvise(fileobj.fileno(), 0, 0, advice)
+    except OSError:
+        pass
+
+_EMPTY_COLUMNS = {"ids": [], "vectors": [], "payloads": []}
+
+def _filter_payload(payload):
+    """Drop payload keys no API endpoint reads."""
+    return {k: v for k, v in payload.items() if k in ALLOWED_PAYLOAD_KEYS}
+
+def make_batch(ids, vectors, payloads):
+    """Build a columnar upsert Batch; validates once instead of per point.
+
+    Batch validation coerces every vector row to a plain list of floats
+    no matter what goes in, so do the conversion up front the cheap
+    way: ndarray rows (memmap views included) are stacked and converted
+    with a single 2-D .tolist() in C, instead of letting validation
+    walk each np.float32 element one at a time.
+    """
+    if vectors and all(isinstance(v, np.ndarray) for v in vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).tolist()
+    else:
+        vectors = [v if isinstance(v, list) else np.asarray(v, dtype=np.float32).tolist()
+                   for v in vectors]
+    return models.Batch(
+        ids=ids,
+        vectors=vectors,
+        payloads=[_filter_payload(p) for p in payloads]
+    )
+
 def process_pickle_file(file_path):
-    """Process a single pickle file and extract points for Qdrant."""
+    """Extract one pickle file into parallel id/vector/payload columns.
+
+    Handles both the legacy row-oriented layout ("points" list of dicts)
+    and the columnar layout the processing pipeline writes, where the
+    pickle holds ids/payloads and the float32 vectors sit in a sibling
+    .vectors.npy file. The sidecar is memory-mapped, so vector data is
+    paged straight out of the file instead of being copied object by
+    object through the pickle stream — the out-of-band-buffer behaviour
+    pickle protocol 5 offers, with the .npy file as the external buffer.
+    """
     try:
         with open(file_path, 'rb') as f:
-            data = pickle.load(f)
-        
-        if not isinstance(data, dict) or 'points' not in data or not data['points']:
+            # Each batch file is read once, front to back: ask for
+            # aggressive readahead going in and drop its pages on the
+            # way out so gigabytes of dead pickles don't evict the
+            # pages the server and shard memmaps still need
+            _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+            if str(file_path).endswith('.zst'):
+                with zstd.ZstdDecompressor().stream_reader(f) as reader:
+                    data = pickle.load(reader)
+            else:
+                data = pickle.load(f)
+            _fadvise(f, "POSIX_FADV_DONTNEED")
+
+        if not isinstance(data, dict):
             logger.warning(f"File {file_path} has no valid points data")
-            return []
-        
-        points = []
-        for point in data['points']:
-            if 'id' not in point or 'vector' not in point:
-                continue
-                
-            # Convert the point to Qdrant format
-            points.append(models.PointStruct(
-                id=point['id'],
-                vector=point['vector'],
-                payload=point.get('payload', {})
-            ))
-        
-        logger.debug(f"Extracted {len(points)} points from {file_path}")
-        return points
+            return _EMPTY_COLUMNS
+
+        if 'points' in data:
+            # Legacy row-oriented layout
+            points = data['points']
+            if not points:
+                logger.warning(f"File {file_path} has no valid points data")
+                return _EMPTY_COLUMNS
+            # Preallocate at the known size: one allocation per column
+            # instead of repeated append-time regrowth/copies
+            ids = [None] * len(points)
+            vectors = [None] * len(points)
+            payloads = [None] * len(points)
+            count = 0
+            for point in points:
+                if 'id' not in point or 'vector' not in point:
+                    continue
+                ids[count] = point['id']
+                vectors[count] = point['vector']
+                payloads[count] = point.get('payload', {})
+                count += 1
+            if count < len(points):
+                del ids[count:], vectors[count:], payloads[count:]
+        elif 'ids' in data:
+            # Columnar layout; vectors inline (v2) or in the sidecar (v3)
+            file_vectors = data.get('vectors')
+            if file_vectors is None:
+                batch_path = Path(file_path)
+                stem = batch_path.name.removesuffix('.zst').removesuffix('.pkl')
+                file_vectors = np.load(batch_path.with_name(stem + ".vectors.npy"), mmap_mode='r')
+
+            ids = list(data['ids'])
+            vectors = list(file_vectors)  # row views, no data copy
+            payloads = list(data.get('payloads', [{}] * len(ids)))
+        else:
+            logger.warning(f"File {file_path} has no valid points data")
+            return _EMPTY_COLUMNS
+
+        logger.debug(f"Extracted {len(ids)} points from {file_path}")
+        return {"ids": ids, "vectors": vectors, "payloads": payloads}
     except Exception as e:
         logger.error(f"Error processing file {file_path}: {e}")
-        return []
+        return _EMPTY_COLUMNS
+
+async def tune_batch_size(client, sample_columns, worker_name):
+    """Pick the fastest upsert batch size by timing a small sweep.
+
+    The fixed BATCH_SIZE was chosen heuristically; throughput usually
+    peaks well below 1000 points per request and degrades past it. The
+    sweep re-upserts sample points (idempotent) with wait=True so each
+    timing includes the server-side commit.
+    """
+    global OPTIMAL_BATCH
+    if OPTIMAL_BATCH is not None:
+        return OPTIMAL_BATCH
+
+    best_size = BATCH_SIZE
+    best_rate = 0.0
+    for size in BATCH_SIZE_GRID:
+        if len(sample_columns["ids"]) < size:
+            break
+        batch = make_batch(
+            sample_columns["ids"][:size],
+            sample_columns["vectors"][:size],
+            sample_columns["payloads"][:size]
+        )
+        start = time.time()
+        await client.upsert(collection_name=COLLECTION_NAME, points=batch, wait=True)
+        elapsed = time.time() - start
+        rate = size / elapsed
+        logger.info(f"{worker_name}: batch_size={size}: {elapsed:.3f}s ({rate:.0f} points/s)")
+        if rate > best_rate:
+            best_rate = rate
+            best_size = size
+
+    OPTIMAL_BATCH = best_size
+    logger.info(f"{worker_name}: using batch_size={best_size}")
+    return best_size
+
+def iter_file_columns(pickle_files, worker_name):
+    """Yield the column dict of each pickle file, in order.
+
+    Up to DECODE_THREADS files decode concurrently — pickle.load spends
+    much of its time in C with the GIL released on I/O — while the
+    DECODE_WINDOW cap keeps at most a handful of decoded files in
+    memory ahead of the consumer.
+    """
+    # Redraw at most every 2s: with all workers in one terminal the
+    # per-item refreshes cost more than they inform
+    progress = tqdm(total=len(pickle_files), desc=f"Processing {worker_name}",
+                    mininterval=2.0, miniters=5)
+    files = iter(pickle_files)
+    with ThreadPoolExecutor(max_workers=DECODE_THREADS) as pool:
+        pending = deque(
+            (f, pool.submit(process_pickle_file, f))
+            for f in itertools.islice(files, DECODE_WINDOW)
+        )
+        while pending:
+            file_path, future = pending.popleft()
+            columns = future.result()
+            next_file = next(files, None)
+            if next_file is not None:
+                pending.append((next_file, pool.submit(process_pickle_file, next_file)))
+            progress.update(1)
+            # Tag each chunk with its origin so the uploader can record
+            # fully uploaded files in the resume log
+            yield {**columns, "source": str(file_path)}
+    progress.close()
+
+def iter_shard_columns(worker_dir, worker_name):
+    """Yield column chunks from a converted shard directory.
+
+    The shard is one contiguous float32 matrix memory-mapped and sliced
+    in SHARD_CHUNK_ROWS steps, with ids/payloads from the JSONL sidecar,
+    so a whole worker directory costs two file opens instead of one per
+    batch pickle and no per-vector Python objects are reconstructed.
+    """
+    worker_path = Path(worker_dir)
+    vectors = np.memmap(worker_path / SHARD_VECTORS_FILE, dtype=np.float32, mode='r')
+    vectors = vectors.reshape(-1, VECTOR_SIZE)
+
+    loads = orjson.loads if orjson is not None else json.loads
+    ids = []
+    payloads = []
+    with open(worker_path / SHARD_PAYLOADS_FILE, "rb") as f:
+        _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+        for line in f:
+            record = loads(line)
+            ids.append(record["id"])
+            payloads.append(record.get("payload", {}))
+
+    offsets = range(0, len(ids), SHARD_CHUNK_ROWS)
+    for i in tqdm(offsets, desc=f"Processing {worker_name}", mininterval=2.0, miniters=5):
+        yield {
+            "ids": ids[i:i + SHARD_CHUNK_ROWS],
+            "vectors": vectors[i:i + SHARD_CHUNK_ROWS],
+            "payloads": payloads[i:i + SHARD_CHUNK_ROWS],
+        }
+
+def _load_bloom(worker_dir):
+    """Load (or create) the directory's Bloom filter of uploaded ids."""
+    if ScalableBloomFilter is None:
+        return None
+    bloom_path = Path(worker_dir) / BLOOM_FILE
+    if bloom_path.exists():
+        with open(bloom_path, "rb") as f:
+            return ScalableBloomFilter.fromfile(f)
+    return ScalableBloomFilter(
+        initial_capacity=BLOOM_INITIAL_CAPACITY,
+        error_rate=BLOOM_ERROR_RATE
+    )
+
+def _save_bloom(bloom, worker_dir):
+    """Snapshot the Bloom filter; write-then-rename keeps it whole."""
+    bloom_path = Path(worker_dir) / BLOOM_FILE
+    tmp_path = bloom_path.with_suffix(".bloom.tmp")
+    with open(tmp_path, "wb") as f:
+        bloom.tofile(f)
+    os.replace(tmp_path, bloom_path)
+
+def _filter_uploaded_columns(column_iter, bloom, worker_name):
+    """Drop points whose ids the Bloom filter says already landed.
+
+    Runs on the producer thread, so the membership tests overlap with
+    uploads. Chunks that empty out entirely are still yielded so their
+    source bookkeeping (progress, done log) stays intact.
+    """
+    skipped = 0
+    for columns in column_iter:
+        keep = [i for i, point_id in enumerate(columns["ids"]) if point_id not in bloom]
+        if len(keep) < len(columns["ids"]):
+            skipped += len(columns["ids"]) - len(keep)
+            columns = {
+                **columns,
+                "ids": [columns["ids"][i] for i in keep],
+                "vectors": [columns["vectors"][i] for i in keep],
+                "payloads": [columns["payloads"][i] for i in keep],
+            }
+        yield columns
+    if skipped:
+        logger.info(f"{worker_name}: skipped {skipped} already uploaded points via Bloom filter")
+
+def _column_producer(column_iter, out_queue):
+    """Producer thread: pre-load the next column chunk while uploads run.
+
+    The two-slot queue double-buffers disk against network — without it
+    the CPU idles during uploads and the NIC idles during unpickling, so
+    throughput is bounded by their sum instead of their max.
+    """
+    try:
+        for columns in column_iter:
+            out_queue.put(columns)
+    finally:
+        out_queue.put(None)  # Sentinel: no more files
+
+async def iter_point_batches(column_iter, batch_size):
+    """Yield fixed-size upsert batches lazily across all column chunks.
+
+    Loading runs in a background thread feeding a bounded queue, so the
+    next chunk is read while the current batches are in flight. Batches
+    may span chunk boundaries; at most two chunks plus one batch are in
+    memory at a time.
+
+    Yields (batch, completed_sources) pairs, where completed_sources
+    lists the source files whose last point sits in that batch — the
+    uploader appends them to the resume log once the batch has landed.
+    """
+    out_queue = queue.Queue(maxsize=2)
+    producer = threading.Thread(
+        target=_column_producer,
+        args=(column_iter, out_queue),
+        daemon=True
+    )
+    producer.start()
+
+    loop = asyncio.get_running_loop()
+    ids = []
+    vectors = []
+    payloads = []
+    pending_sources = deque()  # [source, points not yet handed out]
+
+    def _drain_sources(count):
+        completed = []
+        # Zero-point entries (files fully skipped on resume) complete
+        # with whichever batch is yielded next
+        while pending_sources and (count or pending_sources[0][1] == 0):
+            entry = pending_sources[0]
+            taken = min(count, entry[1])
+            entry[1] -= taken
+            count -= taken
+            if entry[1] == 0:
+                completed.append(pending_sources.popleft()[0])
+        return completed
+
+    while True:
+        # Blocking get runs in the executor so the event loop (and the
+        # in-flight upserts) keep making progress
+        columns = await loop.run_in_executor(None, out_queue.get)
+        if columns is None:
+            break
+        ids.extend(columns["ids"])
+        vectors.extend(columns["vectors"])
+        payloads.extend(columns["payloads"])
+        if columns.get("source"):
+            pending_sources.append([columns["source"], len(columns["ids"])])
+        # Walk the accumulation buffers with an offset and compact once
+        # per chunk: one prefix deletion (or a clear that keeps the
+        # backing storage) instead of a memmove per batch
+        start = 0
+        while len(ids) - start >= batch_size:
+            end = start + batch_size
+            yield (make_batch(ids[start:end], vectors[start:end], payloads[start:end]),
+                   _drain_sources(batch_size))
+            start = end
+        if start == len(ids):
+            ids.clear()
+            vectors.clear()
+            payloads.clear()
+        elif start:
+            del ids[:start], vectors[:start], payloads[:start]
+    if ids:
+        yield make_batch(ids, vectors, payloads), _drain_sources(len(ids))
+    producer.join()
 
 @backoff.on_exception(backoff.expo, Exception, max_tries=5, max_time=300)
-def upload_points_batch(client, points_batch, worker_name):
+async def upload_points_batch(client, points_batch, worker_name, wait=False):
     """Upload a batch of points to Qdrant with retry logic."""
     try:
-        if not points_batch:
+        count = len(points_batch.ids)
+        if not count:
             return 0
-            
-        logger.info(f"{worker_name}: Uploading batch of {len(points_batch)} points")
-        result = client.upsert(
+
+        logger.info(f"{worker_name}: Uploading batch of {count} points")
+        await client.upsert(
             collection_name=COLLECTION_NAME,
             points=points_batch,
-            wait=True
+            wait=wait
         )
-        logger.info(f"{worker_name}: Successfully uploaded {len(points_batch)} points")
-        return len(points_batch)
+        logger.debug(f"{worker_name}: Successfully uploaded {count} points")
+        return count
     except Exception as e:
         logger.error(f"{worker_name}: Error uploading batch: {e}")
         raise  # Let backoff retry
 
-def process_worker_directory(worker_dir_info):
-    """Process all pickle files in a worker directory."""
-    worker_dir, worker_idx = worker_dir_info
+async def process_worker_directory(worker_dir, worker_idx, client, semaphore):
+    """Process all embeddings in a worker directory."""
     worker_name = Path(worker_dir).name
     logger.info(f"Starting processing for {worker_name} (worker {worker_idx})")
-    
-    # Create a client for this worker
-    client = get_qdrant_client()
-    
-    # Get all pickle files
-    pickle_files = get_pickle_files(worker_dir, MAX_FILES_PER_WORKER)
-    if not pickle_files:
-        logger.warning(f"No pickle files found in {worker_name}")
-        return 0
-    
+
+    # Prefer a converted shard; fall back to the per-batch pickles.
+    # Pickle uploads keep a per-directory resume log so a restarted run
+    # skips files whose points already landed; the shard is a single
+    # source, so it has nothing file-grained to resume.
+    done_log = None
+    bloom = _load_bloom(worker_dir)
+    if (Path(worker_dir) / SHARD_VECTORS_FILE).exists():
+        logger.info(f"{worker_name}: using converted shard")
+        column_iter = iter_shard_columns(worker_dir, worker_name)
+    else:
+        pickle_files = get_pickle_files(worker_dir, MAX_FILES_PER_WORKER)
+        done_path = Path(worker_dir) / DONE_FILE
+        if done_path.exists():
+            done_set = set(done_path.read_text().splitlines())
+            remaining = [f for f in pickle_files if str(f) not in done_set]
+            if len(remaining) < len(pickle_files):
+                logger.info(f"{worker_name}: resuming, skipping {len(pickle_files) - len(remaining)} already uploaded files")
+            pickle_files = remaining
+        if not pickle_files:
+            logger.warning(f"No pickle files left to upload in {worker_name}")
+            return 0
+        column_iter = iter_file_columns(pickle_files, worker_name)
+        done_log = open(done_path, "a")
+
+    if bloom is not None:
+        column_iter = _filter_uploaded_columns(column_iter, bloom, worker_name)
+
+    try:
+        return await _process_worker_directory_async(
+            worker_name, column_iter, client, semaphore, done_log,
+            bloom=bloom, worker_dir=worker_dir
+        )
+    finally:
+        if done_log is not None:
+            done_log.close()
+
+async def _process_worker_directory_async(worker_name, column_iter, client, semaphore,
+                                           done_log=None, bloom=None, worker_dir=None):
+    """Upload all files of one worker directory with overlapping upserts.
+
+    Sub-batches go out with wait=False under the shared semaphore, so
+    the network and server-side work overlap with loading the next
+    chunk instead of blocking one round-trip at a time. Only the very
+    last sub-batch — and roughly every BARRIER_EVERY_BATCHES-th one —
+    uses wait=True as a flush barrier, bounding how much unflushed work
+    the server can accumulate (and how much a crash can lose) without
+    paying the commit round-trip on every batch. Source files are
+    appended to done_log only after the gather window carrying their
+    last batch has completed, so the resume log never runs ahead of
+    what the server acknowledged; uploaded ids enter the Bloom filter
+    on the same schedule for sub-file resume.
+    """
     total_points = 0
-    points_batch = []
-    
-    for file_path in tqdm(pickle_files, desc=f"Processing {worker_name}", position=worker_idx):
-        try:
-            points = process_pickle_file(file_path)
-            
-            # Process in smaller sub-batches to avoid overwhelming Qdrant
-            for i in range(0, len(points), BATCH_SIZE):
-                sub_batch = points[i:i+BATCH_SIZE]
-                if sub_batch:
-                    uploaded = upload_points_batch(client, sub_batch, worker_name)
-                    total_points += uploaded
-        except Exception as e:
-            logger.error(f"{worker_name}: Error processing file {file_path}: {e}")
-            # Continue with next file
-    
+
+    async def _send(sub_batch, wait=False):
+        async with semaphore:
+            return await upload_points_batch(client, sub_batch, worker_name, wait=wait)
+
+    def _mark_done(sources):
+        if done_log is None or not sources:
+            return
+        done_log.write("".join(source + "\n" for source in sources))
+        done_log.flush()
+
+    windows_done = 0
+
+    def _record_uploaded(ids):
+        nonlocal windows_done
+        if bloom is None:
+            return
+        for point_id in ids:
+            bloom.add(point_id)
+        windows_done += 1
+        if worker_dir is not None and windows_done % BLOOM_PERSIST_EVERY_WINDOWS == 0:
+            _save_bloom(bloom, worker_dir)
+
+    # Time a batch-size sweep on the first chunk before the main loop,
+    # then chain the chunk back so it is still uploaded. The first read
+    # goes through the executor so it cannot stall the other workers.
+    loop = asyncio.get_running_loop()
+    first_columns = await loop.run_in_executor(None, next, column_iter, _EMPTY_COLUMNS)
+    batch_size = await tune_batch_size(client, first_columns, worker_name)
+    column_iter = itertools.chain([first_columns], column_iter)
+
+    # Stream batches out of the chunks, holding back one batch so
+    # the final one can carry the wait=True flush barrier
+    tasks = []
+    window_sources = []
+    window_ids = []
+    prev_batch = None
+    prev_sources = []
+    batches_sent = 0
+    async for batch, sources in iter_point_batches(column_iter, batch_size):
+        if prev_batch is not None:
+            batches_sent += 1
+            tasks.append(asyncio.ensure_future(
+                _send(prev_batch, wait=batches_sent % BARRIER_EVERY_BATCHES == 0)
+            ))
+            window_sources.extend(prev_sources)
+            window_ids.extend(prev_batch.ids)
+            if len(tasks) >= UPLOAD_CONCURRENCY * 2:
+                total_points += sum(await asyncio.gather(*tasks))
+                tasks = []
+                logger.info(f"{worker_name}: {total_points} points uploaded so far")
+                _mark_done(window_sources)
+                _record_uploaded(window_ids)
+                window_sources = []
+                window_ids = []
+        prev_batch = batch
+        prev_sources = sources
+    if prev_batch is not None:
+        tasks.append(asyncio.ensure_future(_send(prev_batch, wait=True)))
+        window_sources.extend(prev_sources)
+        window_ids.extend(prev_batch.ids)
+    if tasks:
+        total_points += sum(await asyncio.gather(*tasks))
+    _mark_done(window_sources)
+    _record_uploaded(window_ids)
+    if bloom is not None and worker_dir is not None:
+        _save_bloom(bloom, worker_dir)
+
     logger.info(f"Completed {worker_name}: Total points uploaded: {total_points}")
     return total_points
 
+async def upload_all_worker_directories(worker_dirs):
+    """Upload every worker directory concurrently over one shared client.
+
+    A single process with one gRPC connection replaces the previous
+    ProcessPoolExecutor: the heavy lifting is network I/O and decoding
+    (done in producer threads), so extra processes only added pickling
+    of arguments and per-process connection setup. The shared semaphore
+    bounds in-flight upserts across all directories.
+    """
+    client = get_async_qdrant_client()
+    semaphore = asyncio.Semaphore(NUM_WORKERS)
+    total_uploaded = 0
+    try:
+        results = await asyncio.gather(
+            *(process_worker_directory(worker_dir, idx, client, semaphore)
+              for idx, worker_dir in enumerate(worker_dirs)),
+            return_exceptions=True
+        )
+        for worker_dir, result in zip(worker_dirs, results):
+            worker_name = Path(worker_dir).name
+            if isinstance(result, BaseException):
+                logger.error(f"Worker {worker_name} failed: {result}")
+            else:
+                total_uploaded += result
+                logger.info(f"Worker {worker_name} completed: {result} points uploaded")
+    finally:
+        await client.close()
+    return total_uploaded
+
 def main():
     start_time = time.time()
     logger.info(f"Starting vector upload to Qdrant collection '{COLLECTION_NAME}'")
@@ -175,27 +715,13 @@ def main():
     # Get worker directories
     worker_dirs = get_worker_dirs()
     
-    # Add worker index to each directory for positioning progress bars
-    worker_dir_infos = [(worker_dir, idx) for idx, worker_dir in enumerate(worker_dirs)]
-    
-    # Use ProcessPoolExecutor to parallelize processing
-    total_uploaded = 0
-    with concurrent.futures.ProcessPoolExecutor(max_workers=NUM_WORKERS) as executor:
-        # Submit all tasks
-        future_to_worker = {executor.submit(process_worker_directory, worker_dir_info): worker_dir_info[0].name 
-                            for worker_dir_info in worker_dir_infos}
-        
-        # Process results as they complete
-        for future in tqdm(concurrent.futures.as_completed(future_to_worker), 
-                          total=len(future_to_worker), 
-                          desc="Processing worker directories"):
-            worker_name = future_to_worker[future]
-            try:
-                count = future.result()
-                total_uploaded += count
-                logger.info(f"Worker {worker_name} completed: {count} points uploaded")
-            except Exception as e:
-                logger.error(f"Worker {worker_name} failed: {e}")
+    # Defer index building until the bulk load is done
+    set_indexing_threshold(client, 0)
+    try:
+        # Upload all directories concurrently in this process
+        total_uploaded = asyncio.run(upload_all_worker_directories(worker_dirs))
+    finally:
+        set_indexing_threshold(client, INDEXING_THRESHOLD)
     
     # Get the final count from Qdrant
     try: